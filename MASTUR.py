@@ -6,166 +6,222 @@ from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
-from kivy.graphics import Color, Rectangle, Ellipse, Line
+from kivy.graphics import Canvas, Color, Rectangle, Ellipse, Line, PushMatrix, PopMatrix, Translate
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.core.audio import SoundLoader
 from kivy.vector import Vector
-import random
+import os
 import numpy as np
 
+from batch import MeshBatch, disc_texture
+from gameloop import FixedTimestep, lerp
+from mastur_sim import TICKS_POR_SEGUNDO, Simulacion
+from mastur_sim import Mapa as MapaBase
+from profiler import profiler
+from profiler_overlay import ProfilerOverlay
+from raster import PixelCanvas
+from replay import session_from_env
+from text_cache import text_cache
+
 # Configuración de pantalla (ajustado a móvil)
 Window.size = (1080 / 3, 1920 / 3)  # 360x640 aprox
 Window.clearcolor = (0.1, 0.5, 0.2, 1)
 
 # === 🔊 SONIDOS GENERADOS CON CÓDIGO (sin archivos) ===
-# Usaremos arrays de NumPy para crear sonidos
+# Usaremos arrays de NumPy para crear sonidos. Se generan al arrancar el menú
+# (cargar_sonidos), cuando la app ya tiene user_data_dir para la caché
+snd_step = snd_joy = snd_grito = snd_puzzle = snd_combate = None
 try:
     import numpy as np
-    from kivy.core.audio import Sound
-    from array import array
 
-    def crear_sonido(frecuencia, duracion=0.3, forma="sin"):
-        sample_rate = 22050
-        t = np.linspace(0, duracion, int(sample_rate * duracion))
+    from asset_cache import asset_cache
+    from mixer import mixer
+    from soundbank import sound_bank
+
+    SAMPLE_RATE = 22050
+
+    def generar_onda(frecuencia, duracion, forma):
+        t = np.linspace(0, duracion, int(SAMPLE_RATE * duracion))
         if forma == "sin":
             wave = np.sin(2 * np.pi * frecuencia * t)
         elif forma == "noise":
-            wave = np.random.uniform(-1, 1, len(t))
-        wave = (wave * 0.5 * 32767).astype(np.int16)
-        return Sound(array('h', wave.tobytes()), sample_rate=sample_rate)
-
-    snd_step = crear_sonido(400, 0.1)
-    snd_joy = crear_sonido(800, 0.2, "sin")
-    snd_grito = crear_sonido(150, 0.8, "noise")
-    snd_puzzle = crear_sonido(600, 0.15)
-    snd_combate = crear_sonido(200, 0.4, "noise")
+            # Ruido con semilla fija: el mismo sonido en cada ejecución
+            wave = np.random.default_rng(int(frecuencia)).uniform(-1, 1, len(t))
+        return (wave * 0.5 * 32767).astype(np.int16).tobytes()
+
+    def crear_sonido(nombre, frecuencia, duracion=0.3, forma="sin"):
+        # Las ondas se guardan en la caché de disco, se registran como WAV en el
+        # banco y se cargan en el mezclador de voces
+        pcm = asset_cache.pcm(generar_onda, frecuencia, duracion, forma)
+        sound_bank.register(nombre, pcm, SAMPLE_RATE)
+        mixer.load(nombre, pcm, SAMPLE_RATE)
+        return nombre
 except:
-    snd_step = snd_joy = snd_grito = snd_puzzle = snd_combate = None
-
-def reproducir(sonido):
+    crear_sonido = None
+
+def cargar_sonidos(app):
+    global snd_step, snd_joy, snd_grito, snd_puzzle, snd_combate
+    if crear_sonido is None:
+        return
+    try:
+        asset_cache.configure(os.path.join(app.user_data_dir, 'asset_cache'))
+        snd_step = crear_sonido('paso', 400, 0.1)
+        snd_joy = crear_sonido('alegria', 800, 0.2, "sin")
+        snd_grito = crear_sonido('grito', 150, 0.8, "noise")
+        snd_puzzle = crear_sonido('puzzle', 600, 0.15)
+        snd_combate = crear_sonido('combate', 200, 0.4, "noise")
+        sound_bank.cleanup()
+        asset_cache.prune()
+    except:
+        snd_step = snd_joy = snd_grito = snd_puzzle = snd_combate = None
+
+def reproducir(sonido, prioridad=0, tono=1.0):
     if sonido:
-        sonido.play()
+        mixer.trigger(sonido, pitch=tono, priority=prioridad)
 
 # === 🌍 MAPA 2000x2000 ===
-MAPA_ANCHO, MAPA_ALTO = 2000, 2000
-
-class Mapa:
-    def __init__(self):
-        self.arboles = [(random.randint(0, MAPA_ANCHO), random.randint(0, MAPA_ALTO)) for _ in range(120)]
-        self.rocas = [(random.randint(0, MAPA_ANCHO), random.randint(0, MAPA_ALTO)) for _ in range(40)]
-        self.arroyo = [(100 + i*20, 1000 + 20*np.sin(i/10)) for i in range(80)]
-        self.cueva_x, self.cueva_y = 1000, 500
-        self.cima_x, self.cima_y = 1800, 200
-        # Pueblo Cosquín
-        self.cosquin_x, self.cosquin_y = 100, 1300
-        self.tienda_ropa_x, self.tienda_ropa_y = 150, 1350
-        self.tienda_comida_x, self.tienda_comida_y = 200, 1350
-        self.tienda_pociones_x, self.tienda_pociones_y = 250, 1350
-        # NPCs
-        self.npcs = [
-            {"x": 180, "y": 1380, "nombre": "Abuelo", "dialogo": "No subas... él no perdona."},
-            {"x": 220, "y": 1320, "nombre": "Niño", "dialogo": "Mi gato se perdió en la montaña..."},
-            {"x": 270, "y": 1360, "nombre": "Vendedora", "dialogo": "Tengo un encargo para ti..."}
-        ]
-
-    def dibujar(self, canvas, camara_x, camara_y):
-        canvas.clear()
-        # Fondo: verde sierra
+class Mapa(MapaBase):
+    """El mapa de la simulación más su dibujo en el canvas"""
+
+    def construir(self, canvas):
+        """Construye la escena una sola vez: el mundo queda bajo un Translate de cámara"""
+        # Fondo: verde sierra (fijo en pantalla)
         with canvas:
             Color(0.1, 0.5, 0.2)
             Rectangle(pos=(0, 0), size=(1080, 1920))
-
-        # Zonas del mapa
+            PushMatrix()
+            self.camara = Translate(0, 0)
+        self.mundo = Canvas()
+        self.dinamicos = Canvas()  # Objetos del mundo que se mueven (cazador)
+        canvas.add(self.mundo)
+        canvas.add(self.dinamicos)
+        with canvas:
+            PopMatrix()
+        self.dibujar(self.mundo)
+
+    def mover_camara(self, camara_x, camara_y):
+        self.camara.x = -camara_x
+        self.camara.y = -camara_y
+
+    def dibujar(self, canvas):
+        """Dibuja la geometría estática del mapa en coordenadas de mundo"""
+        # Zonas del mapa: árboles y rocas van en un Mesh por tipo (discos texturizados)
+        disco = disc_texture()
+        self.lote_arboles = MeshBatch(texture=disco, capacity=len(self.arboles))
+        for x, y in self.arboles:
+            self.lote_arboles.add(x, y, 30, 30)
+        self.lote_rocas = MeshBatch(texture=disco, capacity=len(self.rocas))
+        for x, y in self.rocas:
+            self.lote_rocas.add(x, y, 20, 12)
         # Bosque
         with canvas:
             Color(0, 0.4, 0)
-            for x, y in self.arboles:
-                Ellipse(pos=(x - camara_x, y - camara_y), size=(30, 30))
+        canvas.add(self.lote_arboles.mesh)
         # Rocas
         with canvas:
             Color(0.3, 0.3, 0.3)
-            for x, y in self.rocas:
-                Ellipse(pos=(x - camara_x, y - camara_y), size=(20, 12))
-        # Arroyo
+        canvas.add(self.lote_rocas.mesh)
+        self.lote_arboles.flush()
+        self.lote_rocas.flush()
+        # Arroyo (una sola polilínea)
         with canvas:
             Color(0.4, 0.8, 1)
-            puntos = [(px - camara_x, py - camara_y) for px, py in self.arroyo]
-            for i in range(len(puntos) - 1):
-                Line(points=[*puntos[i], *puntos[i+1]], width=3)
+            Line(points=[c for punto in self.arroyo for c in punto], width=3)
         # Cueva
         with canvas:
             Color(0.1, 0.1, 0.2)
-            Rectangle(pos=(self.cueva_x - camara_x, self.cueva_y - camara_y), size=(60, 40))
+            Rectangle(pos=(self.cueva_x, self.cueva_y), size=(60, 40))
         # Cima
         with canvas:
             Color(0.5, 0.5, 0.5)
-            Rectangle(pos=(self.cima_x - camara_x, self.cima_y - camara_y), size=(50, 50))
+            Rectangle(pos=(self.cima_x, self.cima_y), size=(50, 50))
 
         # === Pueblo Cosquín ===
         with canvas:
             Color(0.8, 0.7, 0.5)  # Adobe
-            Rectangle(pos=(self.cosquin_x - camara_x, self.cosquin_y - camara_y), size=(100, 80))
+            Rectangle(pos=(self.cosquin_x, self.cosquin_y), size=(100, 80))
             Color(0.7, 0.3, 0.2)  # Teja
             Line(points=[
-                self.cosquin_x - camara_x,
-                self.cosquin_y - camara_y + 80,
-                self.cosquin_x - camara_x + 50,
-                self.cosquin_y - camara_y + 100,
-                self.cosquin_x - camara_x + 100,
-                self.cosquin_y - camara_y + 80
+                self.cosquin_x,
+                self.cosquin_y + 80,
+                self.cosquin_x + 50,
+                self.cosquin_y + 100,
+                self.cosquin_x + 100,
+                self.cosquin_y + 80
             ], width=3)
 
         # Tiendas
-        self.dibujar_tienda(canvas, self.tienda_ropa_x, self.tienda_ropa_y, camara_x, camara_y, "Ropa", "R")
-        self.dibujar_tienda(canvas, self.tienda_comida_x, self.tienda_comida_y, camara_x, camara_y, "Comida", "C")
-        self.dibujar_tienda(canvas, self.tienda_pociones_x, self.tienda_pociones_y, camara_x, camara_y, "Pociones", "P")
+        self.dibujar_tienda(canvas, self.tienda_ropa_x, self.tienda_ropa_y, "Ropa", "R")
+        self.dibujar_tienda(canvas, self.tienda_comida_x, self.tienda_comida_y, "Comida", "C")
+        self.dibujar_tienda(canvas, self.tienda_pociones_x, self.tienda_pociones_y, "Pociones", "P")
 
         # NPCs
         for npc in self.npcs:
             with canvas:
                 Color(0.8, 0.6, 0.4)
-                Ellipse(pos=(npc["x"] - camara_x, npc["y"] - camara_y), size=(20, 20))
+                Ellipse(pos=(npc["x"], npc["y"]), size=(20, 20))
                 Color(0, 0, 0)
-                Label(text="👤", pos=(npc["x"] - camara_x, npc["y"] - camara_y - 10), canvas=canvas)
+            text_cache.dibujar(canvas, "👤", (npc["x"], npc["y"] - 10))
 
-    def dibujar_tienda(self, canvas, x, y, cam_x, cam_y, nombre, letra):
+    def dibujar_tienda(self, canvas, x, y, nombre, letra):
         with canvas:
             Color(0.9, 0.8, 0.6)
-            Rectangle(pos=(x - cam_x, y - cam_y), size=(40, 40))
+            Rectangle(pos=(x, y), size=(40, 40))
             Color(0, 0, 0)
-            Label(text=letra, pos=(x - cam_x + 10, y - cam_y + 10), canvas=canvas)
-            Label(text=nombre, pos=(x - cam_x, y - cam_y - 10), canvas=canvas)
+        # Textos cacheados como rectángulos texturizados (teñidos por el Color activo)
+        text_cache.dibujar(canvas, letra, (x + 10, y + 10))
+        text_cache.dibujar(canvas, nombre, (x, y - 10))
 
 # === 🎞️ SPRITES CON ANIMACIÓN (estilo Pokémon GBA) ===
-def dibujar_sprite(canvas, x, y, tipo, frame=0, flip=False):
-    x_base = x if not flip else x + 32
+# Cada (tipo, frame, flip) se pinta una sola vez con el rasterizador de NumPy y
+# se dibuja después como un único rectángulo texturizado.
+SPRITE_ANCHO, SPRITE_ALTO = 32, 48
+TIPOS_SPRITE = ("alan", "alexis", "joaquin", "cazador")
+FRAMES_SPRITE = 3
+_texturas_sprite = {}
+
+def _rgba(r, g, b):
+    return (round(r * 255), round(g * 255), round(b * 255), 255)
+
+def _rect(lienzo, x, y, ancho, alto, color):
+    lienzo.fill_rect(x, y, x + ancho, y + alto, color)
+
+def _elipse(lienzo, x, y, ancho, alto, color):
+    cx, cy = x + ancho / 2, y + alto / 2
+    lienzo.fill_mask(x, y, x + ancho, y + alto,
+                     lambda xs, ys: ((xs + 0.5 - cx) / (ancho / 2)) ** 2 + ((ys + 0.5 - cy) / (alto / 2)) ** 2 <= 1,
+                     color)
+
+def _linea(lienzo, x0, y0, x1, y1, ancho, color):
+    dx, dy = x1 - x0, y1 - y0
+    largo2 = dx * dx + dy * dy
+    def cerca(xs, ys):
+        t = np.clip(((xs + 0.5 - x0) * dx + (ys + 0.5 - y0) * dy) / largo2, 0, 1)
+        return (xs + 0.5 - x0 - t * dx) ** 2 + (ys + 0.5 - y0 - t * dy) ** 2 <= (ancho * 0.75) ** 2
+    lienzo.fill_mask(0, 0, lienzo.width, lienzo.height, cerca, color)
+
+def pintar_sprite(tipo, frame=0, flip=False):
+    """Pinta el sprite en un PixelCanvas (fila 0 = borde inferior del sprite)"""
+    lienzo = PixelCanvas(SPRITE_ANCHO, SPRITE_ALTO)
+    piel = _rgba(1, 0.8, 0.7)
     # Cabeza
-    with canvas:
-        Color(0, 0, 0)
-        Rectangle(pos=(x_base + 10, y + 8), size=(12, 8))  # Pelo
-        Color(1, 0.8, 0.7)
-        Rectangle(pos=(x_base + 10, y + 10), size=(12, 10))  # Cara
-        # Ojos
-        Color(1, 1, 1)
-        Rectangle(pos=(x_base + 11, y + 10), size=(4, 4))
-        Color(0, 0, 0)
-        Rectangle(pos=(x_base + 12, y + 11), size=(2, 2))
-        # Lentes (Alan)
-        if tipo == "alan":
-            Color(0, 0.5, 1)
-            Rectangle(pos=(x_base + 9, y + 9), size=(6, 6), texture=None)
-        # Rulos (Joaquín)
-        elif tipo == "joaquin":
-            Color(0.4, 0.2, 0.1)
-            Ellipse(pos=(x_base + 10, y + 6), size=(4, 4))
-            Ellipse(pos=(x_base + 18, y + 6), size=(4, 4))
+    _rect(lienzo, 10, 8, 12, 8, _rgba(0, 0, 0))  # Pelo
+    _rect(lienzo, 10, 10, 12, 10, piel)  # Cara
+    # Ojos
+    _rect(lienzo, 11, 10, 4, 4, _rgba(1, 1, 1))
+    _rect(lienzo, 12, 11, 2, 2, _rgba(0, 0, 0))
+    # Lentes (Alan)
+    if tipo == "alan":
+        _rect(lienzo, 9, 9, 6, 6, _rgba(0, 0.5, 1))
+    # Rulos (Joaquín)
+    elif tipo == "joaquin":
+        _elipse(lienzo, 10, 6, 4, 4, _rgba(0.4, 0.2, 0.1))
+        _elipse(lienzo, 18, 6, 4, 4, _rgba(0.4, 0.2, 0.1))
 
     # Cuerpo
-    with canvas:
-        color = (0.5, 0.5, 0.5) if tipo == "alan" else (0, 0, 0.8) if tipo == "alexis" else (1, 1, 1)
-        Color(*color)
-        Rectangle(pos=(x_base + 10, y + 18), size=(12, 12))
+    color = (0.5, 0.5, 0.5) if tipo == "alan" else (0, 0, 0.8) if tipo == "alexis" else (1, 1, 1)
+    _rect(lienzo, 10, 18, 12, 12, _rgba(*color))
 
     # Animación de brazos y piernas
     arm_dy = 0
@@ -177,67 +233,82 @@ def dibujar_sprite(canvas, x, y, tipo, frame=0, flip=False):
         arm_dy = -3
         leg_dy = -4
 
-    with canvas:
-        Color(1, 0.8, 0.7)
-        # Brazos
-        Rectangle(pos=(x_base + 6, y + 20 + arm_dy), size=(4, 6))
-        Rectangle(pos=(x_base + 22, y + 20 - arm_dy), size=(4, 6))
-        # Piernas
-        Rectangle(pos=(x_base + 10, y + 30 + leg_dy), size=(4, 8))
-        Rectangle(pos=(x_base + 18, y + 30 - leg_dy), size=(4, 8))
-        # Zapatos
-        Color(0.3, 0.3, 0.3)
-        Rectangle(pos=(x_base + 10, y + 38 + leg_dy), size=(4, 4))
-        Rectangle(pos=(x_base + 18, y + 38 - leg_dy), size=(4, 4))
+    # Brazos
+    _rect(lienzo, 6, 20 + arm_dy, 4, 6, piel)
+    _rect(lienzo, 22, 20 - arm_dy, 4, 6, piel)
+    # Piernas
+    _rect(lienzo, 10, 30 + leg_dy, 4, 8, piel)
+    _rect(lienzo, 18, 30 - leg_dy, 4, 8, piel)
+    # Zapatos
+    _rect(lienzo, 10, 38 + leg_dy, 4, 4, _rgba(0.3, 0.3, 0.3))
+    _rect(lienzo, 18, 38 - leg_dy, 4, 4, _rgba(0.3, 0.3, 0.3))
 
     # Accesorios
     if tipo == "alan":
-        with canvas:
-            Color(0.3, 0.3, 0.3)
-            Rectangle(pos=(x_base + 26, y + 22), size=(4, 4))  # Fierro
+        _rect(lienzo, 26, 22, 4, 4, _rgba(0.3, 0.3, 0.3))  # Fierro
     elif tipo == "alexis":
-        with canvas:
-            Color(0.2, 0.2, 0.2)
-            Rectangle(pos=(x_base + 8, y + 24), size=(2, 6))  # Cuchillo
+        _rect(lienzo, 8, 24, 2, 6, _rgba(0.2, 0.2, 0.2))  # Cuchillo
     elif tipo == "joaquin":
-        with canvas:
-            Color(0.7, 0.5, 0.3)
-            Ellipse(pos=(x_base + 4, y + 24), size=(6, 4))  # Mate
+        _elipse(lienzo, 4, 24, 6, 4, _rgba(0.7, 0.5, 0.3))  # Mate
     elif tipo == "cazador":
-        with canvas:
-            Color(0.4, 0.2, 0.1)
-            Rectangle(pos=(x_base + 8, y + 6), size=(16, 6))  # Cuernos
-            Color(0.6, 0.3, 0.1)
-            Rectangle(pos=(x_base + 10, y + 12), size=(12, 10))
-            # Arco
-            Color(0.4, 0.2, 0.1)
-            Line(points=[x_base + 8, y + 20, x_base + 24, y + 34], width=2)
-
-# === 👤 CAZADOR CON IA ===
+        _rect(lienzo, 8, 6, 16, 6, _rgba(0.4, 0.2, 0.1))  # Cuernos
+        _rect(lienzo, 10, 12, 12, 10, _rgba(0.6, 0.3, 0.1))
+        # Arco
+        _linea(lienzo, 8, 20, 24, 34, 2, _rgba(0.4, 0.2, 0.1))
+
+    if flip:
+        lienzo.pixels = lienzo.pixels[:, ::-1].copy()
+    return lienzo
+
+def textura_sprite(tipo, frame=0, flip=False):
+    """Textura del sprite, pintada y subida a la GPU solo la primera vez"""
+    clave = (tipo, frame, flip)
+    textura = _texturas_sprite.get(clave)
+    if textura is None:
+        textura = pintar_sprite(tipo, frame, flip).to_texture()
+        textura.mag_filter = 'nearest'  # Pixel art nítido al escalar
+        _texturas_sprite[clave] = textura
+    return textura
+
+def hornear_sprites():
+    """Precalcula todas las combinaciones (tipo, frame, flip)"""
+    for tipo in TIPOS_SPRITE:
+        for frame in range(FRAMES_SPRITE):
+            for flip in (False, True):
+                textura_sprite(tipo, frame, flip)
+
+def dibujar_sprite(canvas, x, y, tipo, frame=0, flip=False):
+    """Dibuja el sprite como un único quad y devuelve el Rectangle"""
+    textura = textura_sprite(tipo, frame, flip)
+    with canvas:
+        Color(1, 1, 1)
+        return Rectangle(texture=textura, pos=(x, y), size=textura.size)
+
+def mover_sprite(rect, x, y, tipo, frame=0, flip=False):
+    """Actualiza un quad existente sin crear instrucciones nuevas"""
+    rect.texture = textura_sprite(tipo, frame, flip)
+    rect.pos = (x, y)
+
+# === 👤 CAZADORES CON IA ===
 class Cazador:
-    def __init__(self, mapa):
-        self.x = mapa.cima_x
-        self.y = mapa.cima_y
-        self.velocidad = 1.8
-        self.frame = 0
-
-    def actualizar(self, jugador_x, jugador_y):
-        dx = jugador_x - self.x
-        dy = jugador_y - self.y
-        dist = (dx**2 + dy**2)**0.5
-        if dist < 50:
-            return "ATACAR"
-        elif dist < 300:
-            if abs(dx) > 5:
-                self.x += self.velocidad * (1 if dx > 0 else -1)
-            if abs(dy) > 5:
-                self.y += self.velocidad * (1 if dy > 0 else -1)
-            return "PERSEGUIR"
-        return "OCULTO"
-
-    def dibujar(self, canvas, camara_x, camara_y):
-        frame = (int(self.x) // 20) % 3
-        dibujar_sprite(canvas, self.x - camara_x, self.y - camara_y, "cazador", frame=frame)
+    """Un cazador del enjambre: la IA vive en los arrays de HunterSwarm"""
+
+    def __init__(self, enjambre, indice):
+        self.enjambre = enjambre
+        self.indice = indice
+        self.sprite = None
+
+    def dibujar(self, canvas, alpha=1.0):
+        # Coordenadas de mundo: la cámara la aplica el Translate del mapa.
+        # alpha interpola entre los dos últimos ticks de la simulación
+        e, i = self.enjambre, self.indice
+        x = lerp(e.prev_x[i], e.x[i], alpha)
+        y = lerp(e.prev_y[i], e.y[i], alpha)
+        frame = (int(x) // 20) % 3
+        if self.sprite is None:
+            self.sprite = dibujar_sprite(canvas, x, y, "cazador", frame=frame)
+        else:
+            mover_sprite(self.sprite, x, y, "cazador", frame=frame)
 
 # === 🎮 INTERFAZ TÁCTIL ===
 class Interfaz(FloatLayout):
@@ -260,8 +331,8 @@ class Interfaz(FloatLayout):
         self.add_widget(self.btn_X)
         self.add_widget(self.btn_Y)
 
-        self.btn_A.bind(on_press=lambda x: juego.interactuar())
-        self.btn_Y.bind(on_press=lambda x: juego.grito_cazador())
+        self.btn_A.bind(on_press=lambda x: juego.enviar('interactuar'))
+        self.btn_Y.bind(on_press=lambda x: juego.enviar('grito'))
 
     def start_move(self, btn, touch):
         if btn.collide_point(*touch.pos):
@@ -275,26 +346,25 @@ class Interfaz(FloatLayout):
             dy = touch.y - centro_y
             mag = (dx**2 + dy**2)**0.5
             if mag > 10:
-                self.juego.mov_x = dx / 50
-                self.juego.mov_y = dy / 50
+                self.juego.enviar('mover', dx / 50, dy / 50)
             else:
-                self.juego.mov_x = self.juego.mov_y = 0
+                self.juego.enviar('mover', 0, 0)
 
     def stop_move(self, btn, touch):
-        self.juego.mov_x = self.juego.mov_y = 0
+        self.juego.enviar('mover', 0, 0)
 
 # === 🧩 MINIJUEGOS ===
 class PuzzleMemoria(Popup):
-    def __init__(self, on_exit):
+    """Vista del puzzle de la cueva; la secuencia y el resultado son de la simulación"""
+
+    def __init__(self, juego, secuencia):
         super().__init__(title="Puzzle de Memoria", size_hint=(0.9, 0.7))
-        self.on_exit = on_exit
-        self.secuencia = [random.randint(1, 9) for _ in range(5)]
-        self.intento = []
+        self.secuencia = secuencia
         layout = BoxLayout(orientation='vertical')
         self.label = Label(text="Memoriza la secuencia...")
         layout.add_widget(self.label)
         for i in range(1, 10):
-            btn = Button(text=str(i), on_press=lambda b, n=int(b.text): self.presionar(n))
+            btn = Button(text=str(i), on_press=lambda b: juego.enviar('presionar', int(b.text)))
             layout.add_widget(btn)
         self.add_widget(layout)
         Clock.schedule_once(self.mostrar, 0.5)
@@ -307,33 +377,29 @@ class PuzzleMemoria(Popup):
         self.label.text = "Ingresa la secuencia"
         reproducir(snd_puzzle)
 
-    def presionar(self, n):
-        self.intento.append(n)
-        if len(self.intento) == len(self.secuencia):
-            if self.intento == self.secuencia:
-                self.label.text = "¡Correcto!"
-                Clock.schedule_once(lambda dt: self.on_exit(True), 1)
-                self.dismiss()
-            else:
-                self.label.text = "Fallaste..."
-                Clock.schedule_once(lambda dt: self.on_exit(False), 1)
-                self.dismiss()
+    def terminar(self, exito):
+        self.label.text = "¡Correcto!" if exito else "Fallaste..."
+        self.dismiss()
 
 # === 🎮 JUEGO PRINCIPAL ===
 class JuegoWidget(FloatLayout):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.jugador_x = 100
-        self.jugador_y = 100
+        # La lógica corre en la simulación sin ventana; aquí solo se dibuja
+        # y se le envían los comandos, que se aplican en el siguiente tick
+        # Con MONTANA_RECORD / MONTANA_REPLAY la partida se graba o se reproduce
+        self.sesion = session_from_env(
+            'mastur', lambda semilla, vista: Simulacion(semilla, Mapa), 1.0 / TICKS_POR_SEGUNDO)
+        self.sim = self.sesion.sim
+        self.mapa = self.sim.mapa
+        self.entradas = []
         self.camara_x = 0
         self.camara_y = 0
-        self.mov_x = 0
-        self.mov_y = 0
-        self.frame = 0
-        self.inventario = {"monedas": 50}
-        self.misiones = {"buscar_gato": False}
-        self.mapa = Mapa()
-        self.cazador = Cazador(self.mapa)
+        self.bucle = FixedTimestep(self.simular, self.render, TICKS_POR_SEGUNDO)
+        self.cazadores = [Cazador(self.sim.enjambre, i) for i in range(len(self.sim.enjambre))]
+        self.sonidos = {'paso': snd_step, 'alegria': snd_joy, 'grito': snd_grito,
+                        'puzzle': snd_puzzle, 'combate': snd_combate}
+        self.popup_puzzle = None
         self.personaje = "alan"  # Puedes cambiarlo
 
         # UI
@@ -344,72 +410,76 @@ class JuegoWidget(FloatLayout):
         self.interfaz = Interfaz(self)
         self.add_widget(self.interfaz)
 
-    def interactuar(self):
-        # Detectar NPCs
-        for npc in self.mapa.npcs:
-            dx = npc["x"] - self.jugador_x
-            dy = npc["y"] - self.jugador_y
-            if (dx**2 + dy**2)**0.5 < 60:
-                popup = Popup(title=npc["nombre"], content=Label(text=npc["dialogo"]), size_hint=(0.8, 0.4))
-                popup.open()
-                return
-
-        # Tiendas
-        tiendas = [
-            (self.mapa.tienda_ropa_x, self.mapa.tienda_ropa_y, "Ropa"),
-            (self.mapa.tienda_comida_x, self.mapa.tienda_comida_y, "Comida"),
-            (self.mapa.tienda_pociones_x, self.mapa.tienda_pociones_y, "Pociones")
-        ]
-        for x, y, nombre in tiendas:
-            if ((x - self.jugador_x)**2 + (y - self.jugador_y)**2)**0.5 < 60:
-                popup = Popup(title=nombre, content=Label(text=f"Bienvenido a la tienda de {nombre}"), size_hint=(0.8, 0.4))
-                popup.open()
-                return
-
-        # Puzzle
-        if ((self.mapa.cueva_x - self.jugador_x)**2 + (self.mapa.cueva_y - self.jugador_y)**2)**0.5 < 80:
-            PuzzleMemoria(on_exit=self.on_puzzle).open()
-
-    def on_puzzle(self, exito):
-        if exito:
-            self.label.text = "¡Resolviste el puzzle! Encontraste un objeto secreto."
-        else:
-            self.label.text = "No lograste resolverlo."
+        # Escena retenida en canvas.before (debajo de la UI): el mundo se
+        # construye una vez y cada frame solo se redibujan los objetos móviles
+        hornear_sprites()
+        self.mapa.construir(self.canvas.before)
+        for cazador in self.cazadores:
+            cazador.dibujar(self.mapa.dinamicos)
+        self.capa_jugador = Canvas()
+        self.canvas.before.add(self.capa_jugador)
+        self.sprite_jugador = dibujar_sprite(self.capa_jugador, Window.width / 2 - 16, Window.height / 2 - 16, self.personaje)
 
-    def grito_cazador(self):
-        reproducir(snd_grito)
-        self.label.text = "¡JA-JA-JA! ¡NUNCA ESCAPARÁS!"
+    def enviar(self, *comando):
+        """Encola un comando para el próximo tick, p. ej. enviar('mover', 1, 0)"""
+        self.entradas.append(comando)
 
     def update(self, dt):
-        self.frame += 1
-
-        # Movimiento
-        self.jugador_x += self.mov_x * 5
-        self.jugador_y += self.mov_y * 5
-        self.jugador_x = max(0, min(MAPA_ANCHO, self.jugador_x))
-        self.jugador_y = max(0, min(MAPA_ALTO, self.jugador_y))
-
-        # Cámara
-        self.camara_x = self.jugador_x - Window.width / 2
-        self.camara_y = self.jugador_y - Window.height / 2
-
-        # Animación de paso
-        moviendose = abs(self.mov_x) > 0.1 or abs(self.mov_y) > 0.1
-        if moviendose and self.frame % 15 == 0:
-            reproducir(snd_step)
-
-        # IA Cazador
-        estado = self.cazador.actualizar(self.jugador_x, self.jugador_y)
-        if estado == "PERSEGUIR" and random.random() < 0.03:
-            self.label.text = "¿Oyes eso...?"
-            reproducir(snd_grito)
-
-        # Render
-        self.canvas.clear()
-        self.mapa.dibujar(self.canvas, self.camara_x, self.camara_y)
-        frame_anim = 0 if not moviendose else (self.frame // 10) % 3
-        dibujar_sprite(self.canvas, Window.width / 2 - 16, Window.height / 2 - 16, self.personaje, frame_anim)
-        self.cazador.dibujar(self.canvas, self.camara_x, self.camara_y)
+        # Simulación a paso fijo; el render interpola y puede ir a otros fps
+        profiler.begin_frame()
+        self.bucle.advance(dt)
+        profiler.end_frame()
+
+    def simular(self, dt):
+        entradas, self.entradas = self.entradas, []
+        with profiler.phase('simulation'):
+            estado = self.sesion.step(dt, entradas)
+        with profiler.phase('events'):
+            for evento in estado['eventos']:
+                self.aplicar_evento(*evento)
+
+    def aplicar_evento(self, nombre, *args):
+        """Refleja en la interfaz un evento de la simulación"""
+        if nombre == 'mensaje':
+            with profiler.phase('hud'):
+                self.label.text = args[0]
+        elif nombre == 'sonido':
+            sonido, prioridad, tono = args
+            with profiler.phase('audio'):
+                reproducir(self.sonidos.get(sonido), prioridad=prioridad, tono=tono)
+        elif nombre == 'dialogo':
+            titulo, texto = args
+            Popup(title=titulo, content=Label(text=texto), size_hint=(0.8, 0.4)).open()
+        elif nombre == 'tienda':
+            Popup(title=args[0], content=Label(text=f"Bienvenido a la tienda de {args[0]}"), size_hint=(0.8, 0.4)).open()
+        elif nombre == 'puzzle':
+            self.popup_puzzle = PuzzleMemoria(self, args[0])
+            self.popup_puzzle.open()
+        elif nombre == 'puzzle_terminado' and self.popup_puzzle:
+            self.popup_puzzle.terminar(args[0])
+            self.popup_puzzle = None
+
+    def render(self, alpha):
+        with profiler.phase('map'):
+            self.dibujar_frame(alpha)
+
+    def dibujar_frame(self, alpha):
+        # Cámara sobre la posición interpolada del jugador
+        sim = self.sim
+        jugador_x = lerp(sim.prev_jugador[0], sim.jugador_x, alpha)
+        jugador_y = lerp(sim.prev_jugador[1], sim.jugador_y, alpha)
+        self.camara_x = jugador_x - Window.width / 2
+        self.camara_y = jugador_y - Window.height / 2
+
+        # Mover la cámara y redibujar solo los objetos dinámicos
+        self.mapa.mover_camara(self.camara_x, self.camara_y)
+        for cazador in self.cazadores:
+            cazador.dibujar(self.mapa.dinamicos, alpha)
+        frame_anim = 0 if not sim.moviendose() else (sim.frame // 10) % 3
+        mover_sprite(self.sprite_jugador, Window.width / 2 - 16, Window.height / 2 - 16, self.personaje, frame_anim)
+
+        # En régimen estable no se debe maquetar ningún texto nuevo por frame
+        text_cache.end_frame()
 
 # === 🎮 PANTALLA PRINCIPAL ===
 class MenuApp(App):
@@ -426,12 +496,29 @@ class MenuApp(App):
             class JuegoApp(App):
                 def build(self):
                     juego = JuegoWidget()
-                    Clock.schedule_interval(juego.update, 1/30)
+                    if snd_step:
+                        mixer.start()
+                    Clock.schedule_interval(juego.update, 1/60)
                     return juego
+
+                def on_start(self):
+                    # Perfilador de frames por fases (F3)
+                    Window.add_widget(ProfilerOverlay(budget=1.0 / TICKS_POR_SEGUNDO))
+
+                def on_stop(self):
+                    # Guarda la grabación o informa del estado final de la reproducción
+                    sesion = self.root.sesion
+                    if sesion.log is not None:
+                        print(f"Partida {'reproducida' if sesion.replaying else 'grabada'}: "
+                              f"huella {sesion.close()}")
             JuegoApp().run()
 
         btn_play.bind(on_press=iniciar_juego)
         return layout
 
+    def on_start(self):
+        # Los sonidos van a la caché de esta app (el juego la reutiliza)
+        cargar_sonidos(self)
+
 if __name__ == '__main__':
     MenuApp().run()
\ No newline at end of file
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ambiente procedural en streaming: en lugar de un clip fijo de 2 segundos, los
+modelos de viento, arroyo, pájaros y campanas generan bloques cortos (50 ms)
+que se encadenan sin costuras. La memoria es constante aunque el ambiente suene
+horas y, al usar un generador aleatorio continuo, nunca se repite.
+
+Uso sin ventana (benchmark de muestras por segundo):
+    python ambience.py mountain 60 ambiente.wav
+"""
+
+import sys
+import threading
+import wave
+from time import time
+
+import numpy as np
+
+from synth import PCM_MAX, SAMPLE_RATE, event_onsets, scatter_bursts, sine
+
+BLOCK_DURATION = 0.05
+RING_BLOCKS = 8  # Bloques generados por adelantado
+STOP_TIMEOUT = 0.5  # Segundos máximos esperando al hilo de salida al parar
+
+# Mismos modelos que generate_mountain_sound / generate_city_sound.
+# bursts: (probabilidad, longitud, amplitud, frecuencia base, variación, frecuencia por muestra)
+MODELS = {
+    'mountain': {
+        'drone': (55.0, 1000),
+        'wind': (20, 10, 10000.0, 500),
+        'bell': None,
+        'bursts': [(0.05, 200, 800, 1000, 500, False),   # arroyo
+                   (0.02, 50, 300, 500, 500, True)],     # hojas
+        'peak': 12000
+    },
+    'city': {
+        'drone': (87.31, 500),
+        'wind': None,
+        'bell': (440, 2000, 0.5, 100),
+        'bursts': [(0.01, 100, 1000, 800, 400, False)],  # pájaros
+        'peak': 5000
+    }
+}
+
+
+class AmbienceStream:
+    """Generador de bloques PCM continuos para un modelo de ambiente"""
+
+    def __init__(self, model='mountain', seed=None, block_duration=BLOCK_DURATION,
+                 sample_rate=SAMPLE_RATE):
+        self.model = MODELS[model]
+        self.sample_rate = sample_rate
+        self.block_size = int(block_duration * sample_rate)
+        self.position = 0  # Muestra absoluta del inicio del próximo bloque
+        self.rng = np.random.default_rng(seed)
+        # Colas de las ráfagas que empiezan en un bloque y terminan en el siguiente
+        self.tail_size = max([burst[1] for burst in self.model['bursts']] or [0])
+        self.carry = np.zeros(self.tail_size)
+
+    def next_block(self):
+        """Siguiente bloque como array float (sin normalizar)"""
+        n = self.block_size
+        model = self.model
+        index = self.position + np.arange(n + self.tail_size, dtype=np.float64)
+        buffer = np.zeros(n + self.tail_size)
+
+        drone_freq, drone_amp = model['drone']
+        buffer[:n] = np.trunc(drone_amp * sine(drone_freq, index[:n], self.sample_rate))
+        if model['wind']:
+            base, depth, period, amp = model['wind']
+            wind_freq = base + depth * np.sin(index[:n] / period)
+            buffer[:n] += np.trunc(amp * sine(wind_freq, index[:n], self.sample_rate))
+        if model['bell']:
+            freq, amp, interval, length = model['bell']
+            bell = index[:n].astype(np.int64) % int(self.sample_rate * interval) < length
+            buffer[:n] += np.where(bell, np.trunc(amp * sine(freq, index[:n], self.sample_rate)), 0)
+
+        # Las ráfagas usan la posición absoluta para que la fase sea continua
+        for probability, length, amp, freq, spread, per_sample in model['bursts']:
+            onsets = event_onsets(n, probability, self.rng)
+            shape = (len(onsets), length) if per_sample else len(onsets)
+            freqs = freq + self.rng.integers(0, spread + 1, shape)
+            scatter_bursts(buffer, onsets, length, amp, freqs, self.sample_rate, self.position)
+
+        buffer[:self.tail_size] += self.carry
+        self.carry = buffer[n:].copy()
+        self.position += n
+        return buffer[:n]
+
+    def next_pcm(self):
+        """Siguiente bloque como bytes PCM 16-bit"""
+        block = self.next_block() * (PCM_MAX / self.model['peak'])
+        return np.clip(block, -PCM_MAX, PCM_MAX).astype('<i2').tobytes()
+
+
+class RingBuffer:
+    """Buffer circular de muestras int16 de capacidad fija (productor/consumidor)"""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.read_pos = 0
+        self.size = 0
+        self.underruns = 0
+        self._lock = threading.Lock()
+
+    @property
+    def free(self):
+        return self.capacity - self.size
+
+    def write(self, samples):
+        """Escribe lo que quepa; devuelve cuántas muestras se escribieron"""
+        with self._lock:
+            count = min(len(samples), self.free)
+            start = (self.read_pos + self.size) % self.capacity
+            first = min(count, self.capacity - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:count - first] = samples[first:count]
+            self.size += count
+            return count
+
+    def read(self, count):
+        """Lee count muestras; si faltan, rellena con silencio"""
+        out = np.zeros(count, dtype=np.int16)
+        with self._lock:
+            available = min(count, self.size)
+            first = min(available, self.capacity - self.read_pos)
+            out[:first] = self.data[self.read_pos:self.read_pos + first]
+            out[first:available] = self.data[:available - first]
+            self.read_pos = (self.read_pos + available) % self.capacity
+            self.size -= available
+            if available < count:
+                self.underruns += 1
+        return out
+
+
+class StreamPlayer:
+    """Reproduce una fuente de bloques PCM con audiostream (si está instalado)
+
+    La fuente expone block_size, sample_rate y next_pcm(). Un Clock de Kivy
+    mantiene el ring buffer lleno y un hilo lo vacía hacia la salida de
+    audio, que bloquea a ritmo de reproducción. Cada play() usa su propio
+    ring y su propia señal de parada: un hilo de una ejecución anterior que
+    siga bloqueado en la salida no lee el audio de la nueva.
+    """
+
+    def __init__(self, source, ring_blocks=RING_BLOCKS):
+        self.stream = source
+        self.ring = RingBuffer(source.block_size * ring_blocks)
+        self.playing = False
+        self._event = None
+        self._thread = None
+        self._stop = None
+        self._output = None
+
+    def play(self):
+        """Empieza a sonar; devuelve False si no hay salida de audio en streaming"""
+        if self.playing:
+            return True
+        try:
+            from audiostream import get_output
+        except ImportError:
+            return False
+        from kivy.clock import Clock
+
+        block = self.stream.block_size
+        self._output = get_output(channels=1, rate=self.stream.sample_rate, buffersize=block)
+        # Ring nuevo: no suena primero lo que quedó en el buffer de la vez anterior
+        self.ring = RingBuffer(self.ring.capacity)
+        self._stop = threading.Event()
+        self.playing = True
+        self.fill()
+        self._event = Clock.schedule_interval(self.fill, block / self.stream.sample_rate)
+        self._thread = threading.Thread(target=self._drain, args=(self.ring, self._output, self._stop),
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def fill(self, *args):
+        """Genera bloques mientras quepan en el ring buffer"""
+        while self.ring.free >= self.stream.block_size:
+            self.ring.write(np.frombuffer(self.stream.next_pcm(), dtype='<i2'))
+
+    def _drain(self, ring, output, stop):
+        from audiostream import AudioSample
+        sample = AudioSample()
+        output.add_sample(sample)
+        sample.play()
+        while not stop.is_set():
+            sample.write(ring.read(self.stream.block_size).tobytes())
+        sample.stop()
+
+    def stop(self):
+        """Para el relleno y espera a que el hilo de salida termine su bloque"""
+        self.playing = False
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+        if self._thread is not None:
+            self._thread.join(STOP_TIMEOUT)
+            self._thread = None
+
+
+class AmbiencePlayer(StreamPlayer):
+    """StreamPlayer de un modelo de ambiente"""
+
+    def __init__(self, model='mountain', seed=None):
+        super().__init__(AmbienceStream(model, seed))
+
+
+def write_wav(path, model='mountain', seconds=10.0, seed=None):
+    """Escribe el stream a un WAV bloque a bloque; devuelve muestras por segundo generadas"""
+    stream = AmbienceStream(model, seed)
+    blocks = int(seconds / BLOCK_DURATION)
+    elapsed = 0.0
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(stream.sample_rate)
+        for _ in range(blocks):
+            start = time()
+            pcm = stream.next_pcm()
+            elapsed += time() - start
+            wav_file.writeframes(pcm)
+    return blocks * stream.block_size / elapsed if elapsed else float('inf')
+
+
+if __name__ == '__main__':
+    model = sys.argv[1] if len(sys.argv) > 1 else 'mountain'
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    path = sys.argv[3] if len(sys.argv) > 3 else f'ambiente_{model}.wav'
+    rate = write_wav(path, model, seconds)
+    print(f"{model}: {seconds:.0f}s en {path}, {rate:,.0f} muestras/s "
+          f"({rate / SAMPLE_RATE:.0f}x tiempo real)")
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+"""
+Caché persistente de assets generados (texturas RGBA y sonidos PCM).
+
+Cada entrada se guarda bajo un hash del código fuente del generador, de
+CACHE_VERSION y de sus parámetros: si el generador cambia, la clave cambia y
+la entrada vieja deja de usarse sin intervención manual. Sin fuente (p. ej. en
+Android, que empaqueta solo .pyc) se usa el bytecode. prune() borra las
+entradas menos usadas cuando la caché pasa de CACHE_LIMIT.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import struct
+from contextlib import contextmanager
+from time import time
+
+CACHE_VERSION = 1
+MAGIC = b'MAST'
+HEADER = struct.Struct('<4sI')  # magia + longitud de los metadatos JSON
+REPORT_FILE = 'startup_report.json'
+CACHE_LIMIT = 64 * 1024 * 1024  # Bytes en disco antes de borrar las entradas más viejas
+
+
+def _running_app():
+    try:
+        from kivy.app import App
+    except ImportError:
+        return None
+    return App.get_running_app()
+
+
+def default_cache_dir():
+    """Directorio de caché: user_data_dir de la app si existe, si no uno en el home"""
+    app = _running_app()
+    if app is not None:
+        return os.path.join(app.user_data_dir, 'asset_cache')
+    return os.path.join(os.path.expanduser('~'), '.montanaprohibida', 'asset_cache')
+
+
+def _code_bytes(code):
+    """Bytecode, nombres y constantes de un code object, con sus funciones anidadas"""
+    parts = [code.co_code, repr(code.co_names).encode('utf-8')]
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            parts.append(_code_bytes(const))
+        elif isinstance(const, frozenset):
+            # El orden de un frozenset cambia con la semilla de hash
+            parts.append(repr(sorted(map(repr, const))).encode('utf-8'))
+        else:
+            parts.append(repr(const).encode('utf-8'))
+    return b'\0'.join(parts)
+
+
+def compiled_fingerprint(obj):
+    """Bytes que identifican una función o módulo sin su código fuente
+
+    Para una función, su bytecode; para un módulo, el archivo (.pyc) cargado.
+    """
+    code = getattr(obj, '__code__', None)
+    if code is not None:
+        return _code_bytes(code)
+    path = getattr(obj, '__file__', None)
+    if path:
+        loader = getattr(obj, '__loader__', None)
+        try:
+            if hasattr(loader, 'get_data'):
+                return loader.get_data(path)
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            pass
+    return getattr(obj, '__qualname__', repr(obj)).encode('utf-8')
+
+
+def source_fingerprint(*objects):
+    """Hash del código fuente de funciones o módulos (o de su bytecode si no hay fuente)"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        try:
+            digest.update(inspect.getsource(obj).encode('utf-8'))
+        except (OSError, TypeError):
+            digest.update(compiled_fingerprint(obj))
+    return digest.hexdigest()
+
+
+class AssetCache:
+    """Caché direccionada por contenido en disco"""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._fingerprints = {}
+        self._used = set()  # Claves leídas o escritas en este arranque
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        if self._directory is not None:
+            return self._directory
+        directory = default_cache_dir()
+        # Sin app aún, el directorio del home no se fija: al arrancar pasa a su user_data_dir
+        if _running_app() is not None:
+            self._directory = directory
+        return directory
+
+    def configure(self, directory):
+        """Cambia el directorio de la caché (p. ej. al user_data_dir de la app)"""
+        self._directory = directory
+
+    def key(self, sources, *params):
+        """Clave de una entrada: fuente de los generadores + versión + parámetros"""
+        sources = tuple(sources) if isinstance(sources, (list, tuple)) else (sources,)
+        fingerprint = self._fingerprints.get(sources)
+        if fingerprint is None:
+            fingerprint = source_fingerprint(*sources)
+            self._fingerprints[sources] = fingerprint
+        raw = json.dumps([CACHE_VERSION, fingerprint, list(params)], default=repr)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.bin')
+
+    def load(self, key):
+        """Devuelve (metadatos, blob) o None si la entrada no existe o está dañada"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                magic, meta_len = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC:
+                    return None
+                meta = json.loads(f.read(meta_len).decode('utf-8'))
+                blob = f.read()
+        except (OSError, ValueError, struct.error):
+            return None
+        if len(blob) != meta.get('size', -1):
+            return None
+        try:
+            os.utime(self._path(key))  # La fecha marca el último uso para prune()
+        except OSError:
+            pass
+        return meta, blob
+
+    def store(self, key, blob, **meta):
+        """Guarda un blob de forma atómica (escritura a temporal + rename)"""
+        meta['size'] = len(blob)
+        encoded = json.dumps(meta).encode('utf-8')
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, len(encoded)))
+                f.write(encoded)
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"No se pudo guardar el asset en caché: {e}")
+
+    def fetch(self, sources, params, build):
+        """Devuelve (metadatos, blob) desde disco o llamando a build() -> (blob, meta)"""
+        key = self.key(sources, *params)
+        self._used.add(key)
+        entry = self.load(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        blob, meta = build()
+        self.store(key, blob, **meta)
+        return meta, blob
+
+    def prune(self, limit=CACHE_LIMIT):
+        """Borra las entradas usadas hace más tiempo hasta quedar por debajo del límite
+
+        Las de este arranque no se tocan. Así desaparecen las de generadores
+        viejos y las de tamaños de ventana que ya no se usan. Devuelve cuántas borró.
+        """
+        entries = []
+        try:
+            folders = [name for name in os.listdir(self.directory) if len(name) == 2]
+        except OSError:
+            return 0
+        for folder in folders:
+            folder = os.path.join(self.directory, folder)
+            try:
+                names = os.listdir(folder)
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp') or name[:-len('.bin')] not in self._used:
+                    entries.append((not name.endswith('.tmp'), stat.st_mtime, stat.st_size, path))
+                else:
+                    limit -= stat.st_size
+        # Primero los temporales huérfanos, luego de la más vieja a la más reciente
+        entries.sort()
+        total = sum(size for _, _, size, _ in entries)
+        removed = 0
+        for is_entry, _, size, path in entries:
+            if is_entry and total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def canvas_blob(self, sources, render, *args):
+        """RGBA de un PixelCanvas cacheado: devuelve (blob, ancho, alto)"""
+        def build():
+            canvas = render(*args)
+            return canvas.tobytes(), {'width': canvas.width, 'height': canvas.height}
+        meta, blob = self.fetch(sources, (render.__name__,) + args, build)
+        return blob, meta['width'], meta['height']
+
+    def pcm(self, generator, *args):
+        """Buffer PCM de un generador de sonido cacheado
+
+        La clave usa el módulo completo del generador, así cambiar una
+        primitiva de síntesis compartida también invalida la entrada.
+        """
+        def build():
+            return bytes(generator(*args)), {}
+        sources = inspect.getmodule(generator) or generator
+        return self.fetch(sources, (generator.__name__,) + args, build)[1]
+
+
+class StartupTimer:
+    """Mide las fases del arranque y compara arranques en frío y en caliente"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.start = time()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time() - start
+
+    def mark(self, name):
+        """Registra el tiempo transcurrido desde el arranque (p. ej. menú visible)"""
+        self.phases[name] = time() - self.start
+
+    def finish(self):
+        """Guarda el arranque actual y devuelve el informe comparativo"""
+        launch = {
+            'kind': 'cold' if self.cache.misses else 'warm',
+            'total': time() - self.start,
+            'phases': self.phases,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses
+        }
+        path = os.path.join(self.cache.directory, REPORT_FILE)
+        try:
+            with open(path, 'r') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            history = {}
+        history[launch['kind']] = launch
+        try:
+            os.makedirs(self.cache.directory, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(history, f, indent=2)
+        except OSError as e:
+            print(f"No se pudo guardar el informe de arranque: {e}")
+        return format_startup_report(history)
+
+
+def format_startup_report(history):
+    """Tabla de tiempos por fase del último arranque en frío y en caliente"""
+    cold = history.get('cold', {})
+    warm = history.get('warm', {})
+    names = list(cold.get('phases', {})) + [n for n in warm.get('phases', {}) if n not in cold.get('phases', {})]
+    lines = [f"{'fase':<20}{'frío (s)':>12}{'caliente (s)':>14}"]
+    for name in names + ['total']:
+        if name == 'total':
+            c, w = cold.get('total'), warm.get('total')
+        else:
+            c, w = cold.get('phases', {}).get(name), warm.get('phases', {}).get(name)
+        c = f"{c:.3f}" if c is not None else '-'
+        w = f"{w:.3f}" if w is not None else '-'
+        lines.append(f"{name:<20}{c:>12}{w:>14}")
+    return '\n'.join(lines)
+
+
+asset_cache = AssetCache()
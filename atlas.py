@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""
+Atlas de sprites: todos los frames de personajes, enemigos e items se pintan
+una sola vez en una textura compartida y se consultan por clave.
+"""
+
+import sys
+from time import time
+
+import numpy as np
+
+import raster
+import sprites
+from raster import PixelCanvas, texture_from_buffer
+from sprites import render_character, render_enemy, render_item
+
+ANIMATION_FRAMES = 3  # Frames de animación que usan los generadores
+ATLAS_WIDTH = 512
+PADDING = 1  # Píxeles de borde repetido alrededor de cada sprite: al escalar no se mezclan vecinos
+EXTRA_CHARACTERS = ('npc', 'monstruo')  # Sprites de personaje que no son jugables
+
+
+def sprite_catalog(characters, enemies, items, frames=ANIMATION_FRAMES):
+    """Enumera las claves del atlas junto con la función que pinta cada una"""
+    catalog = {}
+    for char_id in list(characters) + [c for c in EXTRA_CHARACTERS if c not in characters]:
+        for frame in range(frames):
+            catalog[('character', char_id, frame)] = (render_character, (char_id, frame))
+    for enemy_id in enemies:
+        for frame in range(frames):
+            catalog[('enemy', enemy_id, frame)] = (render_enemy, (enemy_id, frame))
+    for item_id in items:
+        catalog[('item', item_id, 0)] = (render_item, (item_id,))
+    return catalog
+
+
+class SpriteAtlas:
+    """Hornea un catálogo de sprites en una textura y devuelve TextureRegions por clave"""
+
+    def __init__(self, catalog, width=ATLAS_WIDTH):
+        self.catalog = catalog
+        self.width = width
+        self.height = 0
+        self.texture = None
+        self.layout = {}
+        self.regions = {}
+        self.extra_textures = {}
+        self.hits = 0
+        self.misses = 0
+        self.bake_time = 0
+
+    @property
+    def baked(self):
+        return self.texture is not None
+
+    def bake(self, cache=None):
+        """Pinta todo el catálogo y lo sube a la GPU en una sola textura"""
+        if self.baked:
+            return
+        sheet = self.compose_cached(cache) if cache is not None else self.compose()
+        self.upload(sheet)
+
+    def compose_cached(self, cache):
+        """Como compose(), pero reutiliza la hoja guardada en la caché de disco"""
+        start = time()
+
+        def build():
+            sheet = self.compose()
+            layout = [list(key) + list(rect) for key, rect in self.layout.items()]
+            return sheet.tobytes(), {'width': sheet.width, 'height': sheet.height, 'layout': layout}
+
+        sources = (sys.modules[__name__], sprites, raster)
+        params = (self.width, sorted(map(list, self.catalog)))
+        meta, blob = cache.fetch(sources, params, build)
+        self.layout = {tuple(entry[:3]): tuple(entry[3:]) for entry in meta['layout']}
+        self.bake_time = time() - start
+        return PixelCanvas.frombuffer(blob, meta['width'], meta['height'])
+
+    def compose(self):
+        """Pinta y empaqueta el catálogo en un PixelCanvas (no toca la GPU)"""
+        start = time()
+
+        # Sprites idénticos (p. ej. el monstruo como enemigo y como personaje)
+        # comparten la misma región
+        canvases = {}
+        key_to_blob = {}
+        for key, (render, args) in self.catalog.items():
+            canvas = render(*args)
+            blob = canvas.tobytes()
+            canvases.setdefault(blob, canvas)
+            key_to_blob[key] = blob
+
+        # Empaquetado por estantes, de mayor a menor altura; cada hueco lleva
+        # PADDING píxeles de margen y la región es solo el sprite de dentro
+        placements = {}
+        x = y = shelf_height = 0
+        for blob, canvas in sorted(canvases.items(), key=lambda kv: -kv[1].height):
+            slot_width = canvas.width + 2 * PADDING
+            slot_height = canvas.height + 2 * PADDING
+            if x + slot_width > self.width:
+                x, y = 0, y + shelf_height
+                shelf_height = 0
+            placements[blob] = (x + PADDING, y + PADDING, canvas.width, canvas.height)
+            x += slot_width
+            shelf_height = max(shelf_height, slot_height)
+
+        height = 1
+        while height < y + shelf_height:
+            height *= 2
+        sheet = PixelCanvas(self.width, height)
+        for blob, (px, py, w, h) in placements.items():
+            # El margen repite el borde del sprite (extrusión), no es transparente
+            padded = np.pad(canvases[blob].pixels, ((PADDING, PADDING), (PADDING, PADDING), (0, 0)),
+                            mode='edge')
+            sheet.pixels[py - PADDING:py + h + PADDING, px - PADDING:px + w + PADDING] = padded
+
+        self.layout = {key: placements[blob] for key, blob in key_to_blob.items()}
+        self.bake_time = time() - start
+        return sheet
+
+    def upload(self, sheet):
+        """Sube la hoja compuesta a la GPU y crea las regiones (hilo principal)"""
+        start = time()
+        self.height = sheet.height
+        self.texture = texture_from_buffer(sheet.tobytes(), sheet.width, sheet.height)
+        for key, (px, py, w, h) in self.layout.items():
+            self.regions[key] = self.texture.get_region(px, py, w, h)
+        self.bake_time += time() - start
+
+    def get(self, kind, sprite_id, frame=0):
+        """Devuelve la región del sprite; si no está en el atlas la genera aparte"""
+        if not self.baked:
+            self.bake()
+        key = (kind, sprite_id, frame)
+        region = self.regions.get(key)
+        if region is not None:
+            self.hits += 1
+            return region
+
+        self.misses += 1
+        texture = self.extra_textures.get(key)
+        if texture is None:
+            render = {'character': render_character, 'enemy': render_enemy}.get(kind)
+            canvas = render(sprite_id, frame) if render else render_item(sprite_id)
+            texture = canvas.to_texture()
+            self.extra_textures[key] = texture
+        return texture
+
+    def character(self, char_id, frame=0):
+        return self.get('character', char_id, frame)
+
+    def enemy(self, enemy_id, frame=0):
+        return self.get('enemy', enemy_id, frame)
+
+    def item(self, item_id):
+        return self.get('item', item_id, 0)
+
+    def stats(self):
+        """Estadísticas de uso y memoria del atlas"""
+        extra_bytes = sum(t.width * t.height * 4 for t in self.extra_textures.values())
+        return {
+            'entries': len(self.regions),
+            'atlas_size': (self.width, self.height),
+            'hits': self.hits,
+            'misses': self.misses,
+            'late_textures': len(self.extra_textures),
+            'memory_bytes': self.width * self.height * 4 + extra_bytes,
+            'bake_time': self.bake_time
+        }
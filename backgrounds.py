@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Capa de fondos: cada tipo de fondo se pinta una vez por tamaño de ventana y se
+reutiliza hasta que la ventana cambia de tamaño (el logo tiene tamaño fijo).
+Los píxeles se guardan además en la caché de disco para los siguientes arranques.
+
+Al redimensionar, la caché descarta primero las texturas del tamaño viejo y
+avisa a quien use fondos (bind(on_resize=...)) cuando el tamaño deja de
+cambiar, para que un arrastre en escritorio no pinte cada tamaño intermedio.
+"""
+
+from functools import partial
+
+import raster
+import sprites
+from asset_cache import asset_cache
+from raster import texture_from_buffer
+from sprites import LOGO_SIZE, render_background
+
+FIXED_SIZES = {'logo': LOGO_SIZE}  # Fondos que no dependen del tamaño de la ventana
+RESIZE_DELAY = 0.2  # Segundos sin cambios de tamaño antes de avisar para repintar
+
+
+class BackgroundCache:
+    """Texturas de fondo cacheadas por (tipo, tamaño de ventana)"""
+
+    def __init__(self):
+        self._textures = {}
+        self._resize_callbacks = []
+        self._resize_event = None
+        self.builds = 0
+
+    def _key(self, background_type, size):
+        if background_type in FIXED_SIZES:
+            size = FIXED_SIZES[background_type]
+        elif size is None:
+            from kivy.core.window import Window
+            size = Window.size
+        return (background_type, int(size[0]), int(size[1]))
+
+    def get(self, background_type, size=None):
+        """Devuelve la textura del fondo, pintándola solo la primera vez"""
+        key = self._key(background_type, size)
+        texture = self._textures.get(key)
+        if texture is None:
+            texture = self.put(key, self.render(key))
+        return texture
+
+    def peek(self, background_type, size=None):
+        """Textura ya cargada o None, sin pintar nada"""
+        return self._textures.get(self._key(background_type, size))
+
+    def render(self, key):
+        """Píxeles del fondo (sin GPU, se puede llamar desde un hilo de carga)"""
+        background_type, width, height = key
+        return asset_cache.canvas_blob((sprites, raster), render_background,
+                                       background_type, width, height)
+
+    def put(self, key, rendered):
+        """Sube a la GPU los píxeles de render() (hilo principal)"""
+        blob, width, height = rendered
+        texture = texture_from_buffer(blob, width, height)
+        self._textures[key] = texture
+        self.builds += 1
+        return texture
+
+    def preload(self, loader, background_type, size=None):
+        """Encola el fondo en un AssetLoader; devuelve la clave"""
+        key = self._key(background_type, size)
+        if key not in self._textures:
+            loader.submit(f'fondo:{background_type}', partial(self.render, key), partial(self.put, key))
+        return key
+
+    def invalidate(self, window, *args):
+        """Descarta las texturas de otros tamaños y programa el aviso de repintado"""
+        from kivy.clock import Clock
+        size = (int(window.size[0]), int(window.size[1]))
+        self._textures = {key: texture for key, texture in self._textures.items()
+                          if key[0] in FIXED_SIZES or key[1:] == size}
+        if self._resize_event is not None:
+            self._resize_event.cancel()
+        self._resize_event = Clock.schedule_once(self._notify_resize, RESIZE_DELAY)
+
+    def _notify_resize(self, dt):
+        self._resize_event = None
+        for callback in self._resize_callbacks:
+            callback()
+
+    def bind(self, on_resize):
+        """on_resize() se llama cuando hay que volver a pedir los fondos"""
+        self._resize_callbacks.append(on_resize)
+
+    def bind_window(self, window):
+        window.bind(on_resize=self.invalidate)
+
+
+background_cache = BackgroundCache()
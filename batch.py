@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+Dibujo por lotes: todas las instancias de un mismo tipo de decoración (árboles,
+rocas...) se empaquetan en un único Mesh cuyos vértices e índices se generan
+con NumPy. SpriteRenderer hace lo mismo con las entidades de un EntityStore.
+"""
+
+import numpy as np
+from kivy.graphics import Mesh
+
+from raster import PixelCanvas
+
+QUAD_INDICES = np.array([0, 1, 2, 2, 3, 0], dtype=np.int64)
+FULL_UV = (0.0, 0.0, 1.0, 1.0)
+DISC_SIZE = 32
+MAX_QUADS = 65536 // 4  # Los índices del Mesh son unsigned short
+
+
+def uv_from_region(region):
+    """Rectángulo (u0, v0, u1, v1) de una TextureRegion del atlas"""
+    coords = region.tex_coords
+    us, vs = coords[0::2], coords[1::2]
+    return (min(us), min(vs), max(us), max(vs))
+
+
+def disc_texture(size=DISC_SIZE):
+    """Textura blanca con un disco opaco, para dibujar elipses como quads"""
+    canvas = PixelCanvas(size, size)
+    radius = size / 2
+    canvas.fill_mask(0, 0, size, size,
+                     lambda xs, ys: (xs + 0.5 - radius) ** 2 + (ys + 0.5 - radius) ** 2 <= radius ** 2,
+                     (255, 255, 255, 255))
+    return canvas.to_texture()
+
+
+class MeshBatch:
+    """Lote de quads en un solo Mesh con altas y bajas en O(1)"""
+
+    def __init__(self, texture=None, capacity=64):
+        self.texture = texture
+        self.count = 0
+        self._rects = np.zeros((capacity, 4), dtype=np.float32)  # x, y, ancho, alto
+        self._uvs = np.tile(np.array(FULL_UV, dtype=np.float32), (capacity, 1))
+        self._slot_of = {}  # handle -> posición en los arrays
+        self._handle_at = np.zeros(capacity, dtype=np.int64)
+        self._next_handle = 0
+        self._indices_count = -1
+        self.dirty = False
+        self.mesh = Mesh(mode='triangles', texture=texture) if texture else Mesh(mode='triangles')
+
+    def _grow(self):
+        capacity = len(self._rects) * 2
+        self._rects = np.resize(self._rects, (capacity, 4))
+        self._uvs = np.resize(self._uvs, (capacity, 4))
+        self._handle_at = np.resize(self._handle_at, capacity)
+
+    def add(self, x, y, width, height, uv=FULL_UV):
+        """Añade una instancia y devuelve su handle"""
+        if self.count >= MAX_QUADS:
+            raise ValueError("Demasiadas instancias para un solo Mesh")
+        if self.count == len(self._rects):
+            self._grow()
+        slot = self.count
+        self._rects[slot] = (x, y, width, height)
+        self._uvs[slot] = uv
+        handle = self._next_handle
+        self._next_handle += 1
+        self._slot_of[handle] = slot
+        self._handle_at[slot] = handle
+        self.count += 1
+        self.dirty = True
+        return handle
+
+    def remove(self, handle):
+        """Quita una instancia moviendo la última a su hueco"""
+        slot = self._slot_of.pop(handle)
+        last = self.count - 1
+        if slot != last:
+            self._rects[slot] = self._rects[last]
+            self._uvs[slot] = self._uvs[last]
+            moved = int(self._handle_at[last])
+            self._handle_at[slot] = moved
+            self._slot_of[moved] = slot
+        self.count = last
+        self.dirty = True
+
+    def move(self, handle, x, y):
+        slot = self._slot_of[handle]
+        self._rects[slot, 0] = x
+        self._rects[slot, 1] = y
+        self.dirty = True
+
+    def set_instances(self, rects, uvs):
+        """Reemplaza todas las instancias de una vez (los handles dejan de valer)"""
+        count = len(rects)
+        if count > MAX_QUADS:
+            raise ValueError("Demasiadas instancias para un solo Mesh")
+        while count > len(self._rects):
+            self._grow()
+        self._rects[:count] = rects
+        self._uvs[:count] = uvs
+        self._slot_of.clear()
+        self.count = count
+        self.dirty = True
+
+    def vertices(self):
+        """Array (n*4, 4) de vértices x, y, u, v"""
+        rects = self._rects[:self.count]
+        uvs = self._uvs[:self.count]
+        x0, y0 = rects[:, 0], rects[:, 1]
+        x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+        u0, v0, u1, v1 = uvs[:, 0], uvs[:, 1], uvs[:, 2], uvs[:, 3]
+        verts = np.empty((self.count, 4, 4), dtype=np.float32)
+        verts[:, 0] = np.stack([x0, y0, u0, v0], axis=1)
+        verts[:, 1] = np.stack([x1, y0, u1, v0], axis=1)
+        verts[:, 2] = np.stack([x1, y1, u1, v1], axis=1)
+        verts[:, 3] = np.stack([x0, y1, u0, v1], axis=1)
+        return verts.reshape(-1, 4)
+
+    def indices(self):
+        return (np.arange(self.count, dtype=np.int64)[:, np.newaxis] * 4 + QUAD_INDICES).ravel()
+
+    def flush(self):
+        """Sube los vértices al Mesh si hubo cambios; los índices solo si cambió la cantidad"""
+        if not self.dirty:
+            return False
+        self.mesh.vertices = self.vertices().ravel().tolist()
+        if self._indices_count != self.count:
+            self.mesh.indices = self.indices().tolist()
+            self._indices_count = self.count
+        self.dirty = False
+        return True
+
+
+class SpriteRenderer:
+    """Dibuja todas las entidades vivas y visibles en un solo Mesh del atlas"""
+
+    def __init__(self, store, atlas, frames):
+        self.store = store
+        self.atlas = atlas
+        self.frames = frames
+        self.batch = MeshBatch(atlas.texture)
+        self._uvs = np.zeros((0, frames, 4), dtype=np.float32)
+        self._sizes = np.ones((0, frames, 2), dtype=np.float64)
+        self._state = None
+        self.drawn = 0
+
+    def _update_tables(self):
+        """UVs y tamaño de textura por (sprite, frame); los frames que faltan usan el 0"""
+        known = len(self._uvs)
+        keys = self.store.sprite_keys[known:]
+        if not keys:
+            return
+        uvs = np.zeros((len(keys), self.frames, 4), dtype=np.float32)
+        sizes = np.ones((len(keys), self.frames, 2), dtype=np.float64)
+        for i, (kind, sprite_id) in enumerate(keys):
+            for frame in range(self.frames):
+                key = (kind, sprite_id, frame)
+                if key not in self.atlas.regions:
+                    key = (kind, sprite_id, 0)
+                region = self.atlas.regions.get(key)
+                if region is None:
+                    print(f"Sprite fuera del atlas, no se dibuja: {kind}/{sprite_id}")
+                    continue
+                uvs[i, frame] = uv_from_region(region)
+                sizes[i, frame] = self.atlas.layout[key][2:]
+        self._uvs = np.concatenate([self._uvs, uvs])
+        self._sizes = np.concatenate([self._sizes, sizes])
+
+    def render(self, left, bottom, view_width, view_height):
+        """Regenera el Mesh con las entidades dentro de la vista (si algo cambió)"""
+        state = (self.store.version, left, bottom, view_width, view_height)
+        if state == self._state:
+            return
+        self._state = state
+        self._update_tables()
+
+        store = self.store
+        n = store.count
+        x, y = store.x[:n], store.y[:n]
+        w, h = store.width[:n], store.height[:n]
+        ids = np.flatnonzero(store.alive[:n] & store.visible[:n] & (store.sprite[:n] >= 0) &
+                             (x < left + view_width) & (x + w > left) &
+                             (y < bottom + view_height) & (y + h > bottom))[:MAX_QUADS]
+        sprite = store.sprite[ids]
+        frame = np.minimum(store.frame[ids], self.frames - 1)
+
+        # Como un Image con keep_ratio: la textura se ajusta y centra en la caja
+        tex_w, tex_h = self._sizes[sprite, frame, 0], self._sizes[sprite, frame, 1]
+        scale = np.minimum(w[ids] / tex_w, h[ids] / tex_h)
+        draw_w, draw_h = tex_w * scale, tex_h * scale
+        rects = np.stack([x[ids] + (w[ids] - draw_w) / 2, y[ids] + (h[ids] - draw_h) / 2,
+                          draw_w, draw_h], axis=1)
+        self.batch.set_instances(rects, self._uvs[sprite, frame])
+        self.batch.flush()
+        self.drawn = len(ids)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks repetibles de los caminos calientes: texturas, audio, colisiones,
+dibujo del mapa de MASTUR y una partida guionizada de 60 segundos.
+
+Cada caso se mide varias veces tras un calentamiento, con el recolector de
+basura desactivado y semillas fijas, y se resume en percentiles (en ms). El resultado
+se escribe como JSON ordenado para que las regresiones se vean en un diff:
+
+    python -m benchmarks                       # todo, a benchmarks.json
+    python -m benchmarks --only audio collisions --output antes.json
+    python -m benchmarks --quick               # menos repeticiones
+"""
+
+import gc
+import json
+import platform
+import sys
+from time import perf_counter
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+SUITES = ('textures', 'audio', 'collisions', 'map', 'session')
+
+
+def summarize(samples):
+    """Percentiles, media y extremos de una lista de tiempos en segundos (en ms)"""
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    stats = {f'p{p}': float(np.percentile(ms, p)) for p in PERCENTILES}
+    stats.update(min=float(ms.min()), max=float(ms.max()), mean=float(ms.mean()),
+                 runs=len(ms))
+    return {name: round(value, 4) if isinstance(value, float) else value
+            for name, value in stats.items()}
+
+
+def measure(func, repeat=20, warmup=2, setup=None):
+    """Mide func() repeat veces y devuelve el resumen
+
+    setup(), si se da, prepara cada ejecución fuera del tiempo medido y su
+    resultado se pasa a func.
+    """
+    for _ in range(warmup):
+        func(setup()) if setup else func()
+    samples = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            if setup:
+                argument = setup()
+                start = perf_counter()
+                func(argument)
+            else:
+                start = perf_counter()
+                func()
+            samples.append(perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return summarize(samples)
+
+
+def environment():
+    """Versiones con las que se midió, para no comparar máquinas distintas"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.system()
+    }
+
+
+def run(suites=SUITES, quick=False):
+    """Ejecuta las suites pedidas y devuelve {suite: {caso: resumen}}"""
+    import importlib
+    results = {}
+    for name in suites:
+        module = importlib.import_module(f'benchmarks.{name}')
+        start = perf_counter()
+        results[name] = module.run(quick)
+        print(f"{name}: {perf_counter() - start:.1f}s", file=sys.stderr)
+    return results
+
+
+def write_results(results, path):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f,
+                  indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+
+# Las suites que usan Kivy no deben interpretar los argumentos de la línea de comandos
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from benchmarks import SUITES, run, write_results
+
+parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                 description="Benchmarks de La Montaña Prohibida")
+parser.add_argument('--only', nargs='+', choices=SUITES, default=SUITES,
+                    help="suites a ejecutar (por defecto, todas)")
+parser.add_argument('--output', default='benchmarks.json', help="archivo JSON de resultados")
+parser.add_argument('--quick', action='store_true', help="menos repeticiones, para probar")
+args = parser.parse_args()
+
+write_results(run(args.only, args.quick), args.output)
+print(f"Resultados en {args.output}")
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+"""Generadores de sonido de synth.py, con semilla fija donde la aceptan"""
+
+from benchmarks import measure
+from synth import (generate_city_sound, generate_footstep_sound, generate_monster_roar,
+                   generate_mountain_sound, generate_sine_wave)
+
+GENERATORS = {
+    'city': lambda: generate_city_sound(seed=0),
+    'mountain': lambda: generate_mountain_sound(seed=0),
+    'footstep': generate_footstep_sound,
+    'monster_roar': generate_monster_roar,
+    'sine_wave': lambda: generate_sine_wave(440, 1.0)
+}
+
+
+def run(quick=False):
+    repeat = 5 if quick else 30
+    return {name: measure(generator, repeat) for name, generator in GENERATORS.items()}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""GameSimulation.check_collisions con cada vez más entidades repartidas por el mapa"""
+
+import random
+
+from benchmarks import measure
+from simulation import ENEMIES, ITEMS, MAP_SIZE, NPC, Enemy, GameSimulation, Item
+
+ENTITY_COUNTS = (10, 100, 1000, 10000)
+
+
+def populate(sim, count, rng):
+    """Añade count NPCs, items y enemigos (a partes iguales) en posiciones al azar"""
+    width, height = MAP_SIZE
+    item_ids = list(ITEMS)
+    enemy_ids = list(ENEMIES)
+    for i in range(count):
+        kind = ('npc', 'item', 'enemy')[i % 3]
+        if kind == 'npc':
+            entity = NPC(sim.store, name=f"NPC {i}", dialogue=["Hola"])
+        elif kind == 'item':
+            item_id = item_ids[i % len(item_ids)]
+            entity = Item(sim.store, item_id=item_id, name=ITEMS[item_id]['name'],
+                          description=ITEMS[item_id]['description'])
+        else:
+            enemy_id = enemy_ids[i % len(enemy_ids)]
+            data = ENEMIES[enemy_id]
+            entity = Enemy(sim.store, enemy_id=enemy_id, name=data['name'],
+                           health=data['health'], max_health=data['health'],
+                           attack=data['attack'], defense=data['defense'], speed=data['speed'])
+        entity.pos = (rng.uniform(0, width), rng.uniform(0, height))
+        sim.add_entity(kind, f"bench_{kind}_{i}", entity)
+
+
+def run(quick=False):
+    repeat = 200 if quick else 5000
+    results = {}
+    for count in ENTITY_COUNTS:
+        rng = random.Random(count)
+        sim = GameSimulation(seed=0)
+        populate(sim, count, rng)
+        character = sim.characters[sim.current_character]
+        width, height = MAP_SIZE
+
+        def place():
+            # El personaje salta a un punto al azar antes de cada consulta
+            character.pos = (rng.uniform(0, width), rng.uniform(0, height))
+
+        results[f'check_collisions.{count}'] = measure(
+            lambda _: sim.check_collisions(), repeat, warmup=20, setup=place)
+    return results
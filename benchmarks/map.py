@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+"""Mapa.dibujar de MASTUR.py con el bosque y las rocas multiplicados"""
+
+import random
+
+from benchmarks import measure
+
+SCALES = (1, 10, 100)  # 120 árboles y 40 rocas por unidad
+
+
+def run(quick=False):
+    # MASTUR crea la ventana de Kivy al importarse
+    from kivy.graphics import Canvas
+
+    from MASTUR import Mapa
+    from mastur_sim import MAPA_ALTO, MAPA_ANCHO
+
+    repeat = 3 if quick else 20
+    results = {}
+    for scale in SCALES:
+        rng = random.Random(scale)
+        mapa = Mapa(random.Random(0))
+        mapa.arboles = [(rng.randint(0, MAPA_ANCHO), rng.randint(0, MAPA_ALTO))
+                        for _ in range(len(mapa.arboles) * scale)]
+        mapa.rocas = [(rng.randint(0, MAPA_ANCHO), rng.randint(0, MAPA_ALTO))
+                      for _ in range(len(mapa.rocas) * scale)]
+        results[f'dibujar.{len(mapa.arboles)}_arboles.{len(mapa.rocas)}_rocas'] = measure(
+            mapa.dibujar, repeat, setup=Canvas)
+    return results
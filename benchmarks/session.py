@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Partidas guionizadas de 60 segundos de juego, sin ventana
+
+Un jugador de guion recorre el mapa por puntos de paso y reacciona al estado
+(diálogos, combates, tienda, puzzle); sus decisiones solo dependen del estado
+de la simulación, así que con la misma semilla cada ejecución juega la misma
+partida. Se mide el coste de cada tick y se guarda la huella del estado final:
+si cambia, el benchmark ya no mide la misma partida.
+"""
+
+from time import perf_counter
+
+from benchmarks import summarize
+from gameloop import TICK_RATE
+
+SESSION_SECONDS = 60
+SEED = 2024
+
+
+class ScriptedPlayer:
+    """Entradas de La Montaña Prohibida para cada tick, según el estado"""
+
+    # Personaje NPC, item, enemigo y vuelta al inicio
+    WAYPOINTS = ((800, 470), (600, 300), (1000, 800), (100, 100))
+    STEP = 4  # Píxeles por tick (una tecla de dirección mantenida)
+    REACHED = 40  # Distancia a la que se da por alcanzado un punto de paso
+
+    def __init__(self):
+        self.waypoint = 0
+        self.purchases = 0
+        self.shopped = False
+        self.puzzled = False
+
+    def inputs(self, sim, tick):
+        second, frame = divmod(tick, TICK_RATE)
+        state = sim.game_state
+        if state == 'dialogue':
+            if frame % 30 == 0:
+                if sim.dialogue_queue:
+                    return [('next_dialogue',)]
+                # Al cerrar, apartarse para no volver a chocar con el NPC
+                return [('close_dialogue',), ('move', 0, -2 * sim.characters[sim.current_character].height)]
+            return []
+        if state == 'combat':
+            return [('attack',)] if frame % 30 == 0 else []
+        if state == 'store':
+            if frame % 20:
+                return []
+            if self.purchases == 3:
+                return [('close_store',)]
+            self.purchases += 1
+            return [('buy', 'pocion_salud')]
+        if state == 'puzzle':
+            puzzle = sim.puzzle
+            if not puzzle.showing_sequence and frame % 20 == 0:
+                return [('puzzle_press', puzzle.sequence[len(puzzle.player_sequence)])]
+            return []
+        # La tienda a los 20 segundos y el puzzle a los 40 (o en cuanto se pueda)
+        if second >= 20 and not self.shopped:
+            self.shopped = True
+            return [('start_store',)]
+        if second >= 40 and not self.puzzled:
+            self.puzzled = True
+            return [('start_puzzle',)]
+        return [self.walk(sim)]
+
+    def walk(self, sim):
+        char = sim.characters[sim.current_character]
+        target_x, target_y = self.WAYPOINTS[self.waypoint]
+        dx, dy = target_x - char.x, target_y - char.y
+        if abs(dx) <= self.REACHED and abs(dy) <= self.REACHED:
+            self.waypoint = (self.waypoint + 1) % len(self.WAYPOINTS)
+        return ('move', max(-self.STEP, min(self.STEP, dx)), max(-self.STEP, min(self.STEP, dy)))
+
+
+def scripted_mastur(sim, tick, ticks_per_second):
+    """Entradas de MASTUR: del pueblo a la cueva, puzzle y subida a la cima"""
+    second, frame = divmod(tick, ticks_per_second)
+    if sim.puzzle is not None:
+        if frame % 10 == 0:
+            return [('presionar', sim.puzzle.secuencia[len(sim.puzzle.intento)])]
+        return []
+    if frame == 0 and second % 5 == 0:
+        return [('interactuar',)]
+    mapa = sim.mapa
+    target = (mapa.cueva_x, mapa.cueva_y) if second < 30 else (mapa.cima_x, mapa.cima_y)
+    dx, dy = target[0] - sim.jugador_x, target[1] - sim.jugador_y
+    norm = max(1.0, (dx * dx + dy * dy) ** 0.5)
+    return [('mover', dx / norm, dy / norm)]
+
+
+def play(sim, dt, ticks, script):
+    """Juega ticks pasos con las entradas del guion; devuelve los tiempos por tick"""
+    samples = []
+    for tick in range(ticks):
+        inputs = script(sim, tick)
+        start = perf_counter()
+        sim.step(dt, inputs)
+        samples.append(perf_counter() - start)
+    return samples
+
+
+def run(quick=False):
+    from mastur_sim import TICKS_POR_SEGUNDO, Simulacion
+    from simulation import GameSimulation
+
+    seconds = 10 if quick else SESSION_SECONDS
+    results = {}
+
+    sim = GameSimulation(seed=SEED)
+    start = perf_counter()
+    samples = play(sim, 1 / TICK_RATE, seconds * TICK_RATE, ScriptedPlayer().inputs)
+    results['main'] = dict(summarize(samples), total=round((perf_counter() - start) * 1000, 4),
+                           digest=sim.digest())
+
+    sim = Simulacion(semilla=SEED)
+    start = perf_counter()
+    samples = play(sim, 1 / TICKS_POR_SEGUNDO, seconds * TICKS_POR_SEGUNDO,
+                   lambda sim, tick: scripted_mastur(sim, tick, TICKS_POR_SEGUNDO))
+    results['mastur'] = dict(summarize(samples), total=round((perf_counter() - start) * 1000, 4),
+                             digest=sim.digest())
+    return results
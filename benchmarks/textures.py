@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""Texturas procedurales: cada personaje y frame, y los fondos a pantalla completa"""
+
+from benchmarks import measure
+
+BACKGROUNDS = ('mountain_static', 'fog', 'logo')
+BACKGROUND_SIZE = (480, 800)  # Tamaño fijo: no depende de la ventana
+
+
+def run(quick=False):
+    # Subir texturas necesita el contexto GL que crea la ventana de Kivy
+    from kivy.core.window import Window  # noqa: F401
+
+    from atlas import ANIMATION_FRAMES
+    from sprites import CHARACTER_RENDERERS, create_background_texture, create_character_texture
+
+    repeat = 5 if quick else 50
+    results = {}
+    for character_type in CHARACTER_RENDERERS:
+        for frame in range(ANIMATION_FRAMES):
+            results[f'character.{character_type}.{frame}'] = measure(
+                lambda: create_character_texture(character_type, frame), repeat)
+    for background_type in BACKGROUNDS:
+        results[f'background.{background_type}'] = measure(
+            lambda: create_background_texture(background_type, BACKGROUND_SIZE), repeat // 5 or 1)
+    return results
@@ -5,7 +5,7 @@ package.domain = com.OCEX
 source.dir = .
 source.include_exts = py
 version = 1.0
-requirements = python3,kivy,numpy
+requirements = python3,kivy,numpy,audiostream
 orientation = portrait
 fullscreen = 0
 android.api = 30
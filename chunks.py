@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Mundo dividido en chunks de tamaño fijo, cada uno con su propio
+InstructionGroup. Solo los chunks que intersectan la cámara se enganchan al
+canvas, así el trabajo de la GPU depende de lo que se ve y no del tamaño del
+mapa. Dentro de cada chunk, los rectángulos de un mismo color van en un único
+Mesh.
+"""
+
+from kivy.graphics import Color, InstructionGroup
+
+from batch import MeshBatch
+
+CHUNK_SIZE = 256
+MAX_ATTACH_PER_FRAME = 4  # Activación incremental: chunks nuevos por frame
+
+
+class ChunkedWorld:
+    """Geometría estática del mapa repartida en chunks con culling por cámara"""
+
+    def __init__(self, world_size, chunk_size=CHUNK_SIZE, max_attach=MAX_ATTACH_PER_FRAME):
+        self.world_size = world_size
+        self.chunk_size = chunk_size
+        self.max_attach = max_attach
+        self.cols = -(-int(world_size[0]) // chunk_size)
+        self.rows = -(-int(world_size[1]) // chunk_size)
+        self.chunks = {}
+        self.batches = {}  # (chunk, color) -> MeshBatch
+        self.active = set()
+        self.container = InstructionGroup()
+
+    def _chunk(self, key):
+        group = self.chunks.get(key)
+        if group is None:
+            group = self.chunks[key] = InstructionGroup()
+        return group
+
+    def _span(self, start, end, count):
+        """Chunks que cubre [start, end) en un eje; los bordes absorben lo que sobresale"""
+        size = self.chunk_size
+        first = min(max(0, int(start // size)), count - 1)
+        last = min(max(first + 1, int(-(-end // size))), count)
+        return range(first, last)
+
+    def add_rect(self, color, x, y, width, height):
+        """Añade un rectángulo recortándolo contra cada chunk que toca"""
+        size = self.chunk_size
+        x1, y1 = x + width, y + height
+        for cy in self._span(y, y1, self.rows):
+            for cx in self._span(x, x1, self.cols):
+                # Los chunks del borde no recortan hacia fuera del mapa
+                left = max(x, cx * size) if cx > 0 else x
+                right = min(x1, (cx + 1) * size) if cx < self.cols - 1 else x1
+                bottom = max(y, cy * size) if cy > 0 else y
+                top = min(y1, (cy + 1) * size) if cy < self.rows - 1 else y1
+                if right <= left or top <= bottom:
+                    continue
+                self._batch((cx, cy), color).add(left, bottom, right - left, top - bottom)
+
+    def _batch(self, key, color):
+        """Lote del color en el chunk; las capas se dibujan en orden de creación"""
+        batch = self.batches.get((key, color))
+        if batch is None:
+            batch = self.batches[(key, color)] = MeshBatch()
+            group = self._chunk(key)
+            group.add(Color(*color))
+            group.add(batch.mesh)
+        return batch
+
+    def flush(self, keys=None):
+        """Sube a la GPU los lotes modificados (por defecto, de los chunks activos)"""
+        keys = self.active if keys is None else keys
+        for (key, color), batch in self.batches.items():
+            if key in keys:
+                batch.flush()
+
+    def visible_chunks(self, camera_x, camera_y, view_width, view_height):
+        """Chunks que intersectan el rectángulo de la cámara"""
+        size = self.chunk_size
+        cx0 = max(0, int(camera_x // size))
+        cy0 = max(0, int(camera_y // size))
+        cx1 = min(self.cols, int(-(-(camera_x + view_width) // size)))
+        cy1 = min(self.rows, int(-(-(camera_y + view_height) // size)))
+        return {(cx, cy) for cy in range(cy0, cy1) for cx in range(cx0, cx1) if (cx, cy) in self.chunks}
+
+    def update_view(self, camera_x, camera_y, view_width, view_height):
+        """Engancha/desengancha chunks según la cámara; devuelve los pendientes"""
+        visible = self.visible_chunks(camera_x, camera_y, view_width, view_height)
+        for key in self.active - visible:
+            self.container.remove(self.chunks[key])
+        self.active &= visible
+
+        # Los chunks nuevos se activan de a pocos, empezando por el centro de la vista
+        center = ((camera_x + view_width / 2) / self.chunk_size, (camera_y + view_height / 2) / self.chunk_size)
+        pending = sorted(visible - self.active,
+                         key=lambda k: (k[0] + 0.5 - center[0]) ** 2 + (k[1] + 0.5 - center[1]) ** 2)
+        for key in pending[:self.max_attach]:
+            self.container.add(self.chunks[key])
+            self.active.add(key)
+        self.flush()
+        return len(pending) - min(len(pending), self.max_attach)
+
+    def stats(self):
+        return {
+            'chunks': len(self.chunks),
+            'active': len(self.active),
+            'draw_calls': sum(1 for (key, color) in self.batches if key in self.active),
+            'quads': sum(b.count for (key, color), b in self.batches.items() if key in self.active)
+        }
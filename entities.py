@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+"""
+Almacén de entidades en estructura de arrays: posiciones, velocidades,
+estadísticas y claves de sprite viven en arrays de NumPy indexados por id de
+entidad. La lógica del juego usa vistas ligeras (EntityView) que leen y
+escriben esos arrays sin despachar propiedades de Kivy, y el dibujo se hace
+en un único Mesh generado a partir de los arrays (batch.SpriteRenderer).
+No depende de Kivy, así que la simulación puede correr sin ventana.
+"""
+
+import numpy as np
+
+# nombre -> (dtype, valor por defecto)
+FIELDS = {
+    'x': (np.float64, 0.0),
+    'y': (np.float64, 0.0),
+    'vx': (np.float64, 0.0),
+    'vy': (np.float64, 0.0),
+    'width': (np.float64, 0.0),
+    'height': (np.float64, 0.0),
+    'health': (np.float64, 0.0),
+    'max_health': (np.float64, 0.0),
+    'mana': (np.float64, 0.0),
+    'max_mana': (np.float64, 0.0),
+    'attack': (np.float64, 0.0),
+    'defense': (np.float64, 0.0),
+    'speed': (np.float64, 0.0),
+    'gold': (np.float64, 0.0),
+    'sprite': (np.int64, -1),
+    'frame': (np.int64, 0),
+    'visible': (np.bool_, True),
+    'alive': (np.bool_, False)
+}
+MOVE_FIELDS = ('x', 'y', 'width', 'height')
+
+
+class EntityStore:
+    """Arrays de componentes de todas las entidades, con reutilización de ids"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.arrays = {name: np.full(capacity, default, dtype=dtype)
+                       for name, (dtype, default) in FIELDS.items()}
+        self.data = [None] * capacity  # Datos no numéricos (nombre, diálogo...)
+        self.count = 0  # Ids usados alguna vez (marca de agua)
+        self._free = []
+        self.version = 0  # Cambia con cada escritura; el renderer lo usa como caché
+        self.sprite_keys = []  # índice -> (tipo, id de sprite)
+        self._sprite_index = {}
+        self.move_listeners = []
+
+    def __getattr__(self, name):
+        # store.x, store.health... devuelven el array completo
+        try:
+            return self.__dict__['arrays'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return int(self.arrays['alive'][:self.count].sum())
+
+    def _grow(self):
+        capacity = self.capacity * 2
+        for name, (dtype, default) in FIELDS.items():
+            array = np.full(capacity, default, dtype=dtype)
+            array[:self.capacity] = self.arrays[name]
+            self.arrays[name] = array
+        self.data.extend([None] * (capacity - self.capacity))
+        self.capacity = capacity
+
+    def sprite_index(self, kind, sprite_id):
+        """Índice entero de la clave de sprite (tipo, id)"""
+        key = (kind, sprite_id)
+        index = self._sprite_index.get(key)
+        if index is None:
+            index = self._sprite_index[key] = len(self.sprite_keys)
+            self.sprite_keys.append(key)
+        return index
+
+    def spawn(self, **fields):
+        """Crea una entidad y devuelve su id"""
+        if self._free:
+            entity_id = self._free.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow()
+            entity_id = self.count
+            self.count += 1
+        for name, (dtype, default) in FIELDS.items():
+            self.arrays[name][entity_id] = fields.pop(name, default)
+        self.arrays['alive'][entity_id] = True
+        self.data[entity_id] = fields
+        self.version += 1
+        return entity_id
+
+    def despawn(self, entity_id):
+        self.arrays['alive'][entity_id] = False
+        self.data[entity_id] = None
+        self._free.append(entity_id)
+        self.version += 1
+
+    def alive_ids(self):
+        return np.flatnonzero(self.arrays['alive'][:self.count])
+
+    def changed(self, entity_id, moved=False):
+        self.version += 1
+        if moved:
+            for listener in self.move_listeners:
+                listener(entity_id)
+
+
+def _number(value):
+    # Los enteros guardados como float vuelven como int (p. ej. en mensajes de daño)
+    value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class Field:
+    """Atributo de una vista respaldado por un array del almacén"""
+
+    def __init__(self, name):
+        self.name = name
+        self.moves = name in MOVE_FIELDS
+
+    def __get__(self, view, owner):
+        if view is None:
+            return self
+        return _number(view.store.arrays[self.name][view.id])
+
+    def __set__(self, view, value):
+        view.store.arrays[self.name][view.id] = value
+        view.store.changed(view.id, self.moves)
+
+
+class Data:
+    """Atributo no numérico de una vista (se guarda en store.data)"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, view, owner):
+        if view is None:
+            return self
+        return view.store.data[view.id].get(self.name)
+
+    def __set__(self, view, value):
+        view.store.data[view.id][self.name] = value
+
+
+class EntityView:
+    """Vista de una entidad: misma interfaz que un widget para la lógica del juego"""
+
+    x = Field('x')
+    y = Field('y')
+    vx = Field('vx')
+    vy = Field('vy')
+    width = Field('width')
+    height = Field('height')
+    frame = Field('frame')
+
+    def __init__(self, store, sprite=None, **fields):
+        self.store = store
+        if sprite is not None:
+            fields['sprite'] = store.sprite_index(*sprite)
+        self.id = store.spawn(**fields)
+
+    def despawn(self):
+        self.store.despawn(self.id)
+
+    @property
+    def visible(self):
+        return bool(self.store.arrays['visible'][self.id])
+
+    @visible.setter
+    def visible(self, value):
+        self.store.arrays['visible'][self.id] = value
+        self.store.changed(self.id)
+
+    @property
+    def pos(self):
+        return (self.x, self.y)
+
+    @pos.setter
+    def pos(self, value):
+        arrays = self.store.arrays
+        arrays['x'][self.id], arrays['y'][self.id] = value
+        self.store.changed(self.id, moved=True)
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @size.setter
+    def size(self, value):
+        arrays = self.store.arrays
+        arrays['width'][self.id], arrays['height'][self.id] = value
+        self.store.changed(self.id, moved=True)
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def top(self):
+        return self.y + self.height
+
+    @property
+    def center_x(self):
+        return self.x + self.width / 2
+
+    @property
+    def center_y(self):
+        return self.y + self.height / 2
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bucle de juego con paso fijo: la simulación avanza en ticks de duración
+constante acumulando el dt real de cada frame, y el render interpola entre
+los dos últimos estados. Así la velocidad del juego no depende de los fps.
+"""
+
+import heapq
+
+TICK_RATE = 60
+MAX_CATCH_UP = 5  # Ticks máximos por frame (evita la espiral de la muerte)
+
+
+def lerp(previous, current, alpha):
+    """Interpolación lineal entre el estado anterior y el actual"""
+    return previous + (current - previous) * alpha
+
+
+class FixedTimestep:
+    """Llama a simulate(step) a ritmo fijo y a render(alpha) una vez por frame"""
+
+    def __init__(self, simulate, render, tick_rate=TICK_RATE, max_catch_up=MAX_CATCH_UP):
+        self.simulate = simulate
+        self.render = render
+        self.step = 1.0 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped_time = 0.0  # Tiempo descartado al topar el catch-up
+
+    def advance(self, dt):
+        """Avanza el reloj dt segundos; devuelve los ticks simulados"""
+        self.accumulator += dt
+        ticks = 0
+        while self.accumulator >= self.step and ticks < self.max_catch_up:
+            self.simulate(self.step)
+            self.accumulator -= self.step
+            ticks += 1
+        if self.accumulator >= self.step:
+            # Demasiado atrasados: el juego se ralentiza en vez de congelarse
+            excess = self.accumulator - self.accumulator % self.step
+            self.dropped_time += excess
+            self.accumulator -= excess
+        self.ticks += ticks
+        self.render(self.accumulator / self.step)
+        return ticks
+
+
+class Timers:
+    """Temporizadores en tiempo de simulación (el Clock.schedule_once de la lógica)
+
+    Avanzan con los ticks y no con el reloj real, así que una simulación sin
+    ventana dispara los mismos callbacks en el mismo orden.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self._queue = []  # (instante, orden, callback)
+        self._order = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def schedule(self, delay, callback):
+        heapq.heappush(self._queue, (self.time + delay, self._order, callback))
+        self._order += 1
+
+    def advance(self, dt):
+        """Avanza el reloj y llama a los callbacks vencidos, en orden"""
+        self.time += dt
+        while self._queue and self._queue[0][0] <= self.time:
+            callback = heapq.heappop(self._queue)[2]
+            callback()
+
+    def clear(self):
+        self._queue.clear()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+Enjambre de cazadores: la IA del Cazador (ATACAR / PERSEGUIR / OCULTO)
+aplicada a N cazadores a la vez con arrays de NumPy. Un tick calcula
+distancias, estados y movimiento de todos en una sola pasada vectorizada y
+devuelve los índices de cada estado para disparar sonidos y textos.
+
+Benchmark del coste por tick:
+    python hunters.py
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+HIDDEN, CHASE, ATTACK = 0, 1, 2
+STATE_NAMES = ("OCULTO", "PERSEGUIR", "ATACAR")
+ATTACK_RADIUS = 50
+CHASE_RADIUS = 300
+DEAD_ZONE = 5  # Por debajo de esta diferencia no se mueve en ese eje
+
+
+class HunterSwarm:
+    """N cazadores en arrays: posición, posición del tick anterior, velocidad y estado"""
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.by_state = {name: np.zeros(0, dtype=np.int64) for name in STATE_NAMES}
+        self.entered = dict(self.by_state)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, capacity):
+        for name in ('x', 'y', 'prev_x', 'prev_y', 'speed', 'state'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    def spawn(self, x, y, speed):
+        """Añade cazadores (escalares o arrays); devuelve sus índices"""
+        x, y = np.atleast_1d(x), np.atleast_1d(y)
+        n = len(x)
+        if self.count + n > len(self.x):
+            self._grow(max(2 * len(self.x), self.count + n))
+        start, end = self.count, self.count + n
+        self.x[start:end] = self.prev_x[start:end] = x
+        self.y[start:end] = self.prev_y[start:end] = y
+        self.speed[start:end] = speed
+        self.state[start:end] = HIDDEN
+        self.count = end
+        return np.arange(start, end)
+
+    def update(self, target_x, target_y, dt, flow=None):
+        """Un tick para todos: devuelve {estado: índices} de los cazadores en cada estado
+
+        Con un FlowField los que persiguen siguen su dirección (rodeando
+        obstáculos); sin él, o donde el campo no da dirección, van en línea
+        recta. También deja en self.entered los que acaban de cambiar a cada estado.
+        """
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        dx = target_x - x
+        dy = target_y - y
+        dist_sq = dx * dx + dy * dy
+
+        state = np.full(n, HIDDEN, dtype=np.int8)
+        state[dist_sq < CHASE_RADIUS ** 2] = CHASE
+        state[dist_sq < ATTACK_RADIUS ** 2] = ATTACK
+        previous = self.state[:n].copy()
+        self.state[:n] = state
+
+        chasing = np.flatnonzero(state == CHASE)
+        step = self.speed[chasing] * dt
+        move_x = np.where(np.abs(dx[chasing]) > DEAD_ZONE, np.sign(dx[chasing]), 0)
+        move_y = np.where(np.abs(dy[chasing]) > DEAD_ZONE, np.sign(dy[chasing]), 0)
+        if flow is not None and len(chasing):
+            flow.update(target_x, target_y)
+            direction = flow.directions(x[chasing], y[chasing])
+            routed = direction.any(axis=1)
+            move_x = np.where(routed, direction[:, 0], move_x)
+            move_y = np.where(routed, direction[:, 1], move_y)
+        x[chasing] += step * move_x
+        y[chasing] += step * move_y
+
+        changed = state != previous
+        for code, name in enumerate(STATE_NAMES):
+            in_state = state == code
+            self.by_state[name] = np.flatnonzero(in_state)
+            self.entered[name] = np.flatnonzero(in_state & changed)
+        return self.by_state
+
+
+def benchmark(counts=(10, 1000, 100000), ticks=200):
+    """Coste medio por tick con el jugador moviéndose entre los cazadores"""
+    rng = np.random.default_rng(0)
+    results = {}
+    for count in counts:
+        swarm = HunterSwarm(count)
+        swarm.spawn(rng.uniform(0, 2000, count), rng.uniform(0, 2000, count), 54)
+        elapsed = 0.0
+        for tick in range(ticks):
+            target_x = 1000 + 500 * np.sin(tick / 30)
+            target_y = 1000 + 500 * np.cos(tick / 30)
+            start = perf_counter()
+            swarm.update(target_x, target_y, 1 / 30)
+            elapsed += perf_counter() - start
+        results[count] = elapsed / ticks
+    return results
+
+
+if __name__ == '__main__':
+    for count, seconds in benchmark().items():
+        print(f"{count:>7} cazadores: {seconds * 1e6:10.1f} µs/tick")
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+"""
+Diagnóstico de fugas de la interfaz: cuenta por pantalla los widgets vivos,
+las texturas distintas que usan y las instrucciones de canvas, guarda esas
+cuentas a lo largo del tiempo y señala las que solo crecen. También anota
+cuántos widgets son nuevos desde la muestra anterior: una pantalla que
+reconstruye todo en cada cambio no crece, pero se ve en esa cifra.
+
+    tracker = LeakTracker()
+    tracker.sample(screen_manager)   # cada cierto tiempo
+    print(tracker.report())          # 'store.widgets: 41 -> 97 (crece)'
+
+Prueba de resistencia sin pantalla con compras e inventario en bucle (sale con
+código 1 si algo crece sin parar):
+    python leaks.py [rondas]
+
+Desde la línea de comandos usa el driver de vídeo offscreen de SDL: Kivy
+dibuja en un contexto GL sin ventana (EGL), así que no hace falta servidor X
+(sí un OpenGL por software como Mesa/llvmpipe).
+"""
+
+import gc
+import os
+import sys
+from collections import deque
+
+if __name__ == '__main__':
+    # Antes del primer import de Kivy: sin ventana real y sin leer los argumentos
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.graphics import Canvas, InstructionGroup
+from kivy.graphics.texture import Texture
+
+HISTORY = 120  # Muestras guardadas por pantalla
+GROWTH_WINDOW = 8  # Muestras seguidas sin bajar para considerarlo una fuga
+METRICS = ('widgets', 'textures', 'instructions')
+
+
+def _walk_instructions(group, textures):
+    """Instrucciones bajo un canvas o grupo (con before/after), anotando sus texturas"""
+    count = 0
+    groups = [group]
+    while groups:
+        current = groups.pop()
+        if isinstance(current, Canvas):
+            if current.has_before:
+                groups.append(current.before)
+            if current.has_after:
+                groups.append(current.after)
+        for instruction in current.children:
+            count += 1
+            texture = getattr(instruction, 'texture', None)
+            if texture is not None:
+                textures.add(id(texture))
+            if isinstance(instruction, InstructionGroup):
+                groups.append(instruction)
+    return count
+
+
+def count_widget_tree(widget, widget_ids=None):
+    """{'widgets', 'textures', 'instructions'} de un widget y sus descendientes
+
+    El canvas de cada hijo cuelga del de su padre, así que basta recorrer el
+    del widget raíz para contar todas las instrucciones del árbol. Si se pasa
+    un set, se rellena con el id de cada widget.
+    """
+    textures = set()
+    widgets = 0
+    for child in widget.walk(restrict=True):
+        widgets += 1
+        if widget_ids is not None:
+            widget_ids.add(id(child))
+    return {
+        'widgets': widgets,
+        'instructions': _walk_instructions(widget.canvas, textures),
+        'textures': len(textures)
+    }
+
+
+def live_textures():
+    """Texturas de Kivy vivas en todo el proceso (las de las pantallas y las sueltas)"""
+    # type() y no isinstance(): los WeakProxy muertos fallan al consultar __class__
+    return sum(1 for obj in gc.get_objects() if issubclass(type(obj), Texture))
+
+
+class LeakTracker:
+    """Historial de cuentas por pantalla y detección de crecimiento monótono"""
+
+    def __init__(self, history=HISTORY, window=GROWTH_WINDOW):
+        self.window = window
+        self.history = {}  # pantalla -> deque de {métrica: cuenta}
+        self._maxlen = history
+        self._widget_ids = {}  # pantalla -> ids de sus widgets en la muestra anterior
+
+    def sample(self, root, include_process=True):
+        """Toma una muestra de cada pantalla de un ScreenManager (o de un widget suelto)"""
+        screens = getattr(root, 'screens', None)
+        targets = {screen.name: screen for screen in screens} if screens else {'root': root}
+        counts = {}
+        for name, widget in targets.items():
+            widget_ids = set()
+            counts[name] = count_widget_tree(widget, widget_ids)
+            previous = self._widget_ids.get(name)
+            counts[name]['new_widgets'] = len(widget_ids - previous) if previous is not None else 0
+            self._widget_ids[name] = widget_ids
+        if include_process:
+            counts['process'] = {'textures': live_textures()}
+        for name, values in counts.items():
+            self.history.setdefault(name, deque(maxlen=self._maxlen)).append(values)
+        return counts
+
+    def growing(self):
+        """[(pantalla, métrica, primera, última)] que no han bajado en las últimas muestras y crecieron"""
+        leaks = []
+        for name, samples in self.history.items():
+            if len(samples) < self.window:
+                continue
+            recent = list(samples)[-self.window:]
+            for metric in METRICS:
+                if metric not in recent[-1]:
+                    continue
+                values = [sample[metric] for sample in recent]
+                if values[-1] > values[0] and all(a <= b for a, b in zip(values, values[1:])):
+                    leaks.append((name, metric, values[0], values[-1]))
+        return leaks
+
+    def report(self):
+        """Última cuenta de cada pantalla, marcando lo que crece sin parar"""
+        leaks = {(name, metric): (first, last) for name, metric, first, last in self.growing()}
+        lines = []
+        for name, samples in sorted(self.history.items()):
+            latest = samples[-1]
+            parts = []
+            for metric, value in latest.items():
+                if (name, metric) in leaks:
+                    first, last = leaks[(name, metric)]
+                    parts.append(f"{metric} {first} -> {last} (crece)")
+                else:
+                    parts.append(f"{metric} {value}")
+            lines.append(f"{name}: " + ", ".join(parts))
+        return "\n".join(lines)
+
+
+def soak(rounds=40, purchases=5, sample_every=1):
+    """Compras y cambios de inventario en bucle sobre las pantallas reales del juego
+
+    Cada ronda abre la tienda, compra varias veces (con oro de sobra), la
+    cierra y cada tres rondas vacía parte del inventario para que las ranuras
+    del HUD se vacíen y se vuelvan a llenar. Devuelve el tracker. Fuera de
+    python leaks.py, para ir sin pantalla hay que poner SDL_VIDEODRIVER=offscreen
+    antes de importar Kivy.
+    """
+    from kivy.base import EventLoop
+    from kivy.clock import Clock
+    from kivy.lang import Builder
+    from kivy.uix.screenmanager import ScreenManager
+
+    import main
+    from simulation import STORE_ITEMS
+
+    EventLoop.ensure_window()
+    Builder.load_string(main.KV)
+    main.sprite_atlas.upload(main.sprite_atlas.compose())
+    manager = ScreenManager()
+    for screen in (main.GameScreen(name='game'), main.StoreScreen(name='store')):
+        manager.add_widget(screen)
+    game = manager.get_screen('game')
+    game.update_hud()
+    sim = game.sim
+    step = 1.0 / main.TICK_RATE
+
+    def run(ticks, *commands):
+        # Comandos en el primer tick; luego el reloj avanza lo necesario
+        game.inputs.extend(commands)
+        for _ in range(ticks):
+            game.simulate(step)
+            Clock.tick()
+
+    tracker = LeakTracker()
+    for round_index in range(rounds):
+        sim.gold = 10 ** 6  # Que ninguna compra falle por falta de oro
+        run(1, ('start_store',))
+        for purchase in range(purchases):
+            item_id = STORE_ITEMS[(round_index + purchase) % len(STORE_ITEMS)]
+            run(2, ('buy', item_id))
+        run(1, ('close_store',))
+        # Inventario que cambia de orden y de tamaño: vaciar y rellenar ranuras
+        if round_index % 3 == 2:
+            for item_id in list(sim.inventory)[:2]:
+                del sim.inventory[item_id]
+            game.update_hud()
+        if round_index % sample_every == 0:
+            tracker.sample(manager)
+    return tracker
+
+
+if __name__ == '__main__':
+    tracker = soak(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
+    print(tracker.report())
+    sys.exit(1 if tracker.growing() else 0)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+"""
+Carga de assets en segundo plano: la generación (píxeles, PCM, archivos WAV)
+corre en un pool de hilos y las subidas a la GPU vuelven al hilo principal de
+Kivy, unas pocas por frame, para no bloquear el menú mientras se carga.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from kivy.clock import Clock
+
+UPLOAD_BUDGET = 0.008  # Segundos por frame dedicados a subidas en el hilo principal
+
+
+class AssetLoader:
+    """Cola de tareas work() en hilos + upload(resultado) en el hilo principal"""
+
+    def __init__(self, workers=None, upload_budget=UPLOAD_BUDGET):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.upload_budget = upload_budget
+        self.total = 0
+        self.done = 0
+        self.errors = []
+        self._executor = None
+        self._ready = deque()  # Resultados terminados pendientes de subir (thread-safe)
+        self._progress_callbacks = []
+        self._complete_callbacks = []
+        self._event = None
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def finished(self):
+        return self.done == self.total
+
+    def bind(self, on_progress=None, on_complete=None):
+        if on_progress:
+            self._progress_callbacks.append(on_progress)
+        if on_complete:
+            self._complete_callbacks.append(on_complete)
+
+    def submit(self, name, work, upload=None):
+        """Encola work() en el pool; upload(resultado) se llamará en el hilo principal"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix='asset_loader')
+        self.total += 1
+        future = self._executor.submit(work)
+        future.add_done_callback(lambda f: self._ready.append((name, upload, f)))
+        if self._event is None:
+            self._event = Clock.schedule_interval(self._pump, 0)
+
+    def _pump(self, dt):
+        """Procesa resultados terminados hasta agotar el presupuesto del frame"""
+        start = time()
+        processed = 0
+        while self._ready and (processed == 0 or time() - start < self.upload_budget):
+            name, upload, future = self._ready.popleft()
+            try:
+                result = future.result()
+                if upload is not None:
+                    upload(result)
+            except Exception as e:
+                print(f"Error cargando el asset '{name}': {e}")
+                self.errors.append(name)
+            self.done += 1
+            processed += 1
+
+        if processed:
+            for callback in self._progress_callbacks:
+                callback(self.done, self.total)
+        if self.finished:
+            if self._event is not None:
+                self._event.cancel()
+                self._event = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            callbacks, self._complete_callbacks = self._complete_callbacks, []
+            for callback in callbacks:
+                callback()
+
+    def wait(self):
+        """Procesa todo de forma síncrona (arranque sin bucle de eventos)"""
+        while not self.finished:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            self._pump(0)
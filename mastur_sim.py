@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""
+Simulación sin ventana de MASTUR.py: mapa, movimiento del jugador, IA de los
+cazadores, puntos de interés y puzzle de memoria. No importa Kivy; JuegoWidget
+solo dibuja el estado y reacciona a los eventos de cada paso:
+
+    sim = Simulacion()
+    for _ in range(1000):
+        estado = sim.step(1 / TICKS_POR_SEGUNDO, [('mover', 1, 0)])
+"""
+
+import hashlib
+import random
+
+import numpy as np
+
+from gameloop import Timers
+from hunters import CHASE_RADIUS, HunterSwarm
+from navigation import NAV_CELL, FlowField, NavGrid
+from profiler import profiler
+from replay import RandomStreams, new_seed
+from spatial import PointIndex
+
+# === 🌍 MAPA 2000x2000 ===
+MAPA_ANCHO, MAPA_ALTO = 2000, 2000
+
+# Simulación a paso fijo: las velocidades van en píxeles por segundo
+TICKS_POR_SEGUNDO = 30
+VELOCIDAD_JUGADOR = 150  # 5 px por tick
+VELOCIDAD_CAZADOR = 54  # 1.8 px por tick
+CELDAS_RUTA = 2 * CHASE_RADIUS // NAV_CELL  # Alcance del campo de flujo, con margen para rodear
+
+
+class Mapa:
+    def __init__(self, azar=random):
+        self.arboles = [(azar.randint(0, MAPA_ANCHO), azar.randint(0, MAPA_ALTO)) for _ in range(120)]
+        self.rocas = [(azar.randint(0, MAPA_ANCHO), azar.randint(0, MAPA_ALTO)) for _ in range(40)]
+        self.arroyo = [(100 + i*20, 1000 + 20*np.sin(i/10)) for i in range(80)]
+        self.cueva_x, self.cueva_y = 1000, 500
+        self.cima_x, self.cima_y = 1800, 200
+        # Pueblo Cosquín
+        self.cosquin_x, self.cosquin_y = 100, 1300
+        self.tienda_ropa_x, self.tienda_ropa_y = 150, 1350
+        self.tienda_comida_x, self.tienda_comida_y = 200, 1350
+        self.tienda_pociones_x, self.tienda_pociones_y = 250, 1350
+        # NPCs
+        self.npcs = [
+            {"x": 180, "y": 1380, "nombre": "Abuelo", "dialogo": "No subas... él no perdona."},
+            {"x": 220, "y": 1320, "nombre": "Niño", "dialogo": "Mi gato se perdió en la montaña..."},
+            {"x": 270, "y": 1360, "nombre": "Vendedora", "dialogo": "Tengo un encargo para ti..."}
+        ]
+
+    def puntos_interes(self):
+        """Puntos con los que se puede interactuar: (tipo, x, y, datos)"""
+        for npc in self.npcs:
+            yield "npc", npc["x"], npc["y"], npc
+        yield "tienda", self.tienda_ropa_x, self.tienda_ropa_y, "Ropa"
+        yield "tienda", self.tienda_comida_x, self.tienda_comida_y, "Comida"
+        yield "tienda", self.tienda_pociones_x, self.tienda_pociones_y, "Pociones"
+        yield "cueva", self.cueva_x, self.cueva_y, None
+        yield "cima", self.cima_x, self.cima_y, None
+
+    def rejilla_navegacion(self):
+        """Rejilla con árboles y rocas bloqueados, para el campo de flujo de los cazadores"""
+        rejilla = NavGrid(MAPA_ANCHO, MAPA_ALTO)
+        for x, y in self.arboles:
+            rejilla.block_rect(x, y, 30, 30, margin=5)
+        for x, y in self.rocas:
+            rejilla.block_rect(x, y, 20, 12, margin=5)
+        return rejilla
+
+
+class SecuenciaMemoria:
+    """Lógica del puzzle de la cueva: repetir una secuencia de 5 números"""
+
+    def __init__(self, azar=random):
+        self.secuencia = [azar.randint(1, 9) for _ in range(5)]
+        self.intento = []
+
+    def presionar(self, n):
+        """Devuelve None mientras falten números; al completar, si acertó"""
+        self.intento.append(n)
+        if len(self.intento) < len(self.secuencia):
+            return None
+        return self.intento == self.secuencia
+
+
+class Simulacion:
+    """Estado de una partida de MASTUR, avanzado tick a tick con step()"""
+
+    def __init__(self, semilla=None, clase_mapa=Mapa):
+        # Azar por subsistema: con la misma semilla y entradas, la misma partida
+        self.semilla = semilla if semilla is not None else new_seed()
+        self.azar = RandomStreams(self.semilla)
+        self.jugador_x = 100
+        self.jugador_y = 100
+        self.prev_jugador = (self.jugador_x, self.jugador_y)
+        self.mov_x = 0
+        self.mov_y = 0
+        self.frame = 0  # Ticks de simulación
+        self.inventario = {"monedas": 50}
+        self.misiones = {"buscar_gato": False}
+        self.mapa = clase_mapa(self.azar['mapa'])  # La vista pasa un Mapa que sabe dibujarse
+        self.enjambre = HunterSwarm()
+        self.enjambre.spawn(self.mapa.cima_x, self.mapa.cima_y, VELOCIDAD_CAZADOR)
+        # Un solo campo de flujo hacia el jugador, compartido por todo el enjambre
+        self.flujo = FlowField(self.mapa.rejilla_navegacion(), max_distance=CELDAS_RUTA)
+        self.interactuables = self.crear_interactuables()
+        self.puzzle = None
+        self.temporizadores = Timers()
+        self.eventos = []
+        self.comandos = {
+            'mover': self.mover,
+            'interactuar': self.interactuar,
+            'grito': self.grito_cazador,
+            'presionar': self.presionar
+        }
+
+    def crear_interactuables(self):
+        """Índice de puntos de interés del mapa, construido una sola vez"""
+        indice = PointIndex()
+        # tipo: (radio, prioridad, acción)
+        self.acciones = {}
+        for tipo, radio, prioridad, accion in (
+                ("npc", 60, 0, self.hablar),
+                ("tienda", 60, 1, self.abrir_tienda),
+                ("cueva", 80, 2, self.entrar_cueva),
+                ("cima", 60, 3, self.llegar_cima)):
+            indice.register_kind(tipo, radio, prioridad)
+            self.acciones[tipo] = accion
+        for tipo, x, y, datos in self.mapa.puntos_interes():
+            indice.add(tipo, x, y, datos)
+        return indice
+
+    def emitir(self, nombre, *args):
+        """Evento para la vista: ('mensaje', texto), ('sonido', nombre, prioridad, tono)..."""
+        self.eventos.append((nombre, *args))
+
+    def step(self, dt, entradas=()):
+        """Aplica los comandos (nombre, *args), avanza un tick y devuelve el estado"""
+        self.eventos = []
+        for comando in entradas:
+            self.comandos[comando[0]](*comando[1:])
+        self.temporizadores.advance(dt)
+        self.simular(dt)
+        return {
+            'tick': self.frame,
+            'jugador': (self.jugador_x, self.jugador_y),
+            'cazadores': {estado: len(indices) for estado, indices in self.enjambre.by_state.items()},
+            'eventos': self.eventos
+        }
+
+    def simular(self, dt):
+        self.frame += 1
+
+        # Movimiento (en píxeles por segundo)
+        self.prev_jugador = (self.jugador_x, self.jugador_y)
+        self.jugador_x += self.mov_x * VELOCIDAD_JUGADOR * dt
+        self.jugador_y += self.mov_y * VELOCIDAD_JUGADOR * dt
+        self.jugador_x = max(0, min(MAPA_ANCHO, self.jugador_x))
+        self.jugador_y = max(0, min(MAPA_ALTO, self.jugador_y))
+
+        # Animación de paso
+        if self.moviendose() and self.frame % 15 == 0:
+            self.emitir('sonido', 'paso', 0, self.azar['pasos'].uniform(0.9, 1.1))
+
+        # IA de todos los cazadores en un paso vectorizado
+        with profiler.phase('ai'):
+            estados = self.enjambre.update(self.jugador_x, self.jugador_y, dt, self.flujo)
+        if len(estados["PERSEGUIR"]) and self.azar['cazadores'].random() < 0.03:
+            self.emitir('mensaje', "¿Oyes eso...?")
+            self.emitir('sonido', 'grito', 2, 1.0)
+
+    def digest(self):
+        """Huella del estado (jugador, cazadores y reloj) para comparar reproducciones"""
+        n = len(self.enjambre)
+        digest = hashlib.sha1()
+        for array in (self.enjambre.x, self.enjambre.y, self.enjambre.state):
+            digest.update(array[:n].tobytes())
+        digest.update(repr((self.frame, self.jugador_x, self.jugador_y, self.mov_x, self.mov_y,
+                            self.temporizadores.time)).encode())
+        return digest.hexdigest()
+
+    def moviendose(self):
+        return abs(self.mov_x) > 0.1 or abs(self.mov_y) > 0.1
+
+    # === Comandos ===
+
+    def mover(self, mov_x, mov_y):
+        """Dirección del joystick (se mantiene hasta el próximo comando)"""
+        self.mov_x = mov_x
+        self.mov_y = mov_y
+
+    def interactuar(self):
+        punto = self.interactuables.nearest(self.jugador_x, self.jugador_y)
+        if punto:
+            tipo, datos = punto
+            self.acciones[tipo](datos)
+
+    def hablar(self, npc):
+        self.emitir('dialogo', npc["nombre"], npc["dialogo"])
+
+    def abrir_tienda(self, nombre):
+        self.emitir('tienda', nombre)
+
+    def entrar_cueva(self, datos):
+        self.puzzle = SecuenciaMemoria(self.azar['puzzle'])
+        self.emitir('puzzle', self.puzzle.secuencia)
+
+    def llegar_cima(self, datos):
+        self.emitir('mensaje', "Has llegado a la cima de la montaña...")
+
+    def presionar(self, n):
+        """Número pulsado en el puzzle de la cueva"""
+        if self.puzzle is None:
+            return
+        exito = self.puzzle.presionar(n)
+        if exito is None:
+            return
+        self.puzzle = None
+        self.emitir('puzzle_terminado', exito)
+        self.temporizadores.schedule(1, lambda: self.on_puzzle(exito))
+
+    def on_puzzle(self, exito):
+        if exito:
+            self.emitir('mensaje', "¡Resolviste el puzzle! Encontraste un objeto secreto.")
+        else:
+            self.emitir('mensaje', "No lograste resolverlo.")
+
+    def grito_cazador(self):
+        self.emitir('sonido', 'grito', 2, 1.0)
+        self.emitir('mensaje', "¡JA-JA-JA! ¡NUNCA ESCAPARÁS!")
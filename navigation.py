@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+"""
+Navegación por campo de flujo: los obstáculos del mapa se rasterizan en una
+rejilla y un BFS (vectorizado con NumPy, expandiendo el frente en las 8
+direcciones) calcula la distancia de cada celda a la celda del jugador. De ahí
+sale una dirección por celda que comparten todos los perseguidores: cada uno
+solo lee la de su celda, sin buscar caminos por su cuenta.
+"""
+
+import numpy as np
+
+NAV_CELL = 20
+# Vecinos (dx, dy) en celdas
+OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+def _shift(array, dx, dy, fill):
+    """array desplazado para que out[cy, cx] = array[cy + dy, cx + dx]"""
+    out = np.full_like(array, fill)
+    h, w = array.shape
+    out[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)] = \
+        array[max(0, dy):h - max(0, -dy), max(0, dx):w - max(0, -dx)]
+    return out
+
+
+class NavGrid:
+    """Rejilla de celdas bloqueadas por obstáculos"""
+
+    def __init__(self, width, height, cell_size=NAV_CELL):
+        self.cell_size = cell_size
+        self.cols = -(-int(width) // cell_size)
+        self.rows = -(-int(height) // cell_size)
+        self.blocked = np.zeros((self.rows, self.cols), dtype=bool)
+
+    def cell(self, x, y):
+        """Celda (cx, cy) de un punto, recortada a la rejilla (acepta arrays)"""
+        cx = np.clip(np.floor_divide(x, self.cell_size).astype(np.int64), 0, self.cols - 1)
+        cy = np.clip(np.floor_divide(y, self.cell_size).astype(np.int64), 0, self.rows - 1)
+        return cx, cy
+
+    def block_rect(self, x, y, width, height, margin=0):
+        """Marca como bloqueadas las celdas que toca el rectángulo (más un margen)"""
+        size = self.cell_size
+        cx0 = max(0, int((x - margin) // size))
+        cy0 = max(0, int((y - margin) // size))
+        cx1 = min(self.cols, int((x + width + margin) // size) + 1)
+        cy1 = min(self.rows, int((y + height + margin) // size) + 1)
+        self.blocked[cy0:cy1, cx0:cx1] = True
+
+
+class FlowField:
+    """Campo de direcciones hacia un objetivo, recalculado solo si cambia de celda
+
+    Con max_distance el BFS se limita a una ventana de ese radio (en celdas)
+    alrededor del objetivo y se detiene a esa distancia: fuera, el campo no da
+    dirección. Las máscaras de paso se calculan una vez, así que la rejilla
+    debe estar completa al crear el campo.
+    """
+
+    def __init__(self, grid, max_distance=None):
+        self.grid = grid
+        self.max_distance = max_distance
+        self.target_cell = None
+        self.distance = np.full(grid.blocked.shape, UNREACHABLE, dtype=np.int32)
+        self.dir_x = np.zeros(grid.blocked.shape)
+        self.dir_y = np.zeros(grid.blocked.shape)
+        self.rebuilds = 0
+        self._free = ~grid.blocked
+        self._masks = self._passable(self._free)
+
+    def update(self, target_x, target_y):
+        """Apunta el campo al objetivo; devuelve True si hubo que recalcularlo"""
+        cx, cy = self.grid.cell(target_x, target_y)
+        cell = (int(cx), int(cy))
+        if cell == self.target_cell:
+            return False
+        self.target_cell = cell
+        start = self._nearest_free(cell)
+        window = self._window(start)
+        self._distances(start, window)
+        self._directions(window)
+        self.rebuilds += 1
+        return True
+
+    def _window(self, cell):
+        """Slices (filas, columnas) de la zona que puede alcanzar el BFS"""
+        if self.max_distance is None:
+            return (slice(None), slice(None))
+        reach = self.max_distance
+        return (slice(max(0, cell[1] - reach), cell[1] + reach + 1),
+                slice(max(0, cell[0] - reach), cell[0] + reach + 1))
+
+    def _nearest_free(self, cell):
+        """La propia celda si está libre; si el objetivo pisa un obstáculo, la libre más cercana"""
+        blocked = self.grid.blocked
+        if not blocked[cell[1], cell[0]] or blocked.all():
+            return cell
+        free_y, free_x = np.nonzero(~blocked)
+        nearest = np.argmin((free_x - cell[0]) ** 2 + (free_y - cell[1]) ** 2)
+        return (int(free_x[nearest]), int(free_y[nearest]))
+
+    def _passable(self, free):
+        """Por vecino: máscara de celdas desde las que se puede ir hacia él
+
+        Las diagonales exigen que las dos celdas ortogonales también estén
+        libres, para no cortar esquinas de obstáculos.
+        """
+        masks = {}
+        for dx, dy in OFFSETS:
+            mask = _shift(free, dx, dy, False)
+            if dx and dy:
+                mask &= _shift(free, dx, 0, False) & _shift(free, 0, dy, False)
+            masks[(dx, dy)] = mask
+        return masks
+
+    def _distances(self, cell, window):
+        # BFS por frentes dentro de la ventana: cada iteración expande el
+        # frente a sus 8 vecinos libres, hasta max_distance pasos
+        free = self._free[window]
+        masks = {offset: mask[window] for offset, mask in self._masks.items()}
+        distance = np.full(free.shape, UNREACHABLE, dtype=np.int32)
+        frontier = np.zeros(free.shape, dtype=bool)
+        frontier[cell[1] - (window[0].start or 0), cell[0] - (window[1].start or 0)] = True
+        distance[frontier] = 0
+        # El frente va en un array con borde de una celda: cada vecino es una vista, sin copias
+        h, w = free.shape
+        padded = np.zeros((h + 2, w + 2), dtype=bool)
+        neighbours = [(padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w], masks[(dx, dy)])
+                      for dx, dy in OFFSETS]
+        unvisited = free.copy()
+        unvisited[frontier] = False
+        grown = np.empty_like(frontier)
+        reached = np.empty_like(frontier)
+        step = 0
+        while frontier.any() and (self.max_distance is None or step < self.max_distance):
+            step += 1
+            padded[1:-1, 1:-1] = frontier
+            grown[:] = False
+            for neighbour, mask in neighbours:
+                np.logical_and(neighbour, mask, out=reached)
+                grown |= reached
+            frontier = grown & unvisited
+            unvisited &= ~frontier
+            distance[frontier] = step
+        self.distance[:] = UNREACHABLE
+        self.distance[window] = distance
+
+    def _directions(self, window):
+        # Cada celda apunta al vecino con menor distancia (fuera de la ventana, sin dirección)
+        distance = self.distance[window]
+        best = distance.copy()
+        dir_x = np.zeros(distance.shape)
+        dir_y = np.zeros(distance.shape)
+        for dx, dy in OFFSETS:
+            neighbour = _shift(distance, dx, dy, UNREACHABLE)
+            better = (neighbour < best) & self._masks[(dx, dy)][window]
+            best[better] = neighbour[better]
+            norm = (dx * dx + dy * dy) ** 0.5
+            dir_x[better] = dx / norm
+            dir_y[better] = dy / norm
+        self.dir_x[:] = 0
+        self.dir_y[:] = 0
+        self.dir_x[window] = dir_x
+        self.dir_y[window] = dir_y
+
+    def directions(self, xs, ys):
+        """Dirección (n, 2) para cada punto; (0, 0) en la celda objetivo o sin camino"""
+        cx, cy = self.grid.cell(np.asarray(xs), np.asarray(ys))
+        return np.stack([self.dir_x[cy, cx], self.dir_y[cy, cx]], axis=-1)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+Perfilador de frames por fases: cada fase del bucle (mapa, colisiones, IA,
+HUD, audio...) se mide con un temporizador con nombre y el tiempo de cada
+frame queda en un buffer circular de los últimos N frames, de donde salen
+percentiles e histogramas. No importa Kivy (ProfilerOverlay, en
+profiler_overlay.py, lo dibuja en pantalla).
+
+    with profiler.phase('ai'):
+        swarm.update(...)
+
+Las fases anidadas descuentan su tiempo de la fase que las contiene, así que
+los tiempos por fase se pueden apilar. Desactivado (lo normal), phase()
+devuelve un contexto vacío compartido y begin_frame/end_frame solo miran un
+booleano. MONTANA_PROFILE=1 lo activa al arrancar; F3 lo alterna en el juego.
+"""
+
+import os
+from time import perf_counter
+
+import numpy as np
+
+PROFILE_ENV = 'MONTANA_PROFILE'
+DEFAULT_FRAMES = 240  # 4 segundos a 60 fps
+OTHER = 'other'  # Tiempo del frame fuera de cualquier fase
+
+
+class _NullScope:
+    """Contexto que no hace nada: lo que cuesta una fase con el perfilador apagado"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """Temporizador de una fase; pausa la fase que lo contiene mientras dura"""
+
+    __slots__ = ('profiler', 'column')
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+
+    def __enter__(self):
+        now = perf_counter()
+        stack = self.profiler._stack
+        if stack:
+            parent = stack[-1]
+            self.profiler._current[parent[0]] += now - parent[1]
+        stack.append([self.column, now])
+        return self
+
+    def __exit__(self, *exc):
+        now = perf_counter()
+        stack = self.profiler._stack
+        column, start = stack.pop()
+        self.profiler._current[column] += now - start
+        if stack:
+            stack[-1][1] = now  # La fase de fuera sigue desde aquí
+        return False
+
+
+class FrameProfiler:
+    """Tiempos por fase de los últimos frames, en un buffer circular"""
+
+    def __init__(self, frames=DEFAULT_FRAMES, enabled=False):
+        self.enabled = enabled
+        self.capacity = frames
+        self.phases = [OTHER]  # Nombre de cada columna, en orden de aparición
+        self._scopes = {}
+        self._samples = np.zeros((frames, 8))  # frame -> segundos por fase
+        self._current = np.zeros(8)
+        self._stack = []
+        self._frame_start = None
+        self.cursor = 0  # Próxima fila a escribir
+        self.count = 0  # Frames guardados (hasta la capacidad)
+        self.frames = 0  # Frames medidos desde el último reset
+
+    def phase(self, name):
+        """Contexto que mide una fase del frame actual"""
+        if not self.enabled:
+            return NULL_SCOPE
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = _Scope(self, self._add_phase(name))
+        return scope
+
+    def _add_phase(self, name):
+        column = len(self.phases)
+        self.phases.append(name)
+        if column == self._samples.shape[1]:
+            self._samples = np.pad(self._samples, ((0, 0), (0, column)))
+            self._current = np.pad(self._current, (0, column))
+        return column
+
+    def begin_frame(self):
+        if self.enabled:
+            self._current[:] = 0
+            self._stack.clear()
+            self._frame_start = perf_counter()
+
+    def end_frame(self):
+        """Cierra el frame: lo no asignado a ninguna fase cuenta como 'other'"""
+        if not self.enabled or self._frame_start is None:
+            return
+        total = perf_counter() - self._frame_start
+        self._frame_start = None
+        self._current[0] = max(0.0, total - self._current[1:].sum())
+        self._samples[self.cursor] = self._current
+        self.cursor = (self.cursor + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.frames += 1
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self):
+        self._samples[:] = 0
+        self._stack.clear()
+        self._frame_start = None
+        self.cursor = 0
+        self.count = 0
+        self.frames = 0
+
+    # === Agregados ===
+
+    def recent(self):
+        """Array (frames, fases) en ms, del más antiguo al más reciente"""
+        columns = len(self.phases)
+        if self.count < self.capacity:
+            samples = self._samples[:self.count, :columns]
+        else:
+            samples = np.roll(self._samples[:, :columns], -self.cursor, axis=0)
+        return samples * 1000
+
+    def totals(self):
+        """Duración en ms de cada frame reciente"""
+        return self.recent().sum(axis=1)
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """{fase: {'p50': ms, ...}} de cada fase y del frame completo ('frame')"""
+        if not self.count:
+            return {}
+        samples = self.recent()
+        values = np.percentile(samples, percentiles, axis=0)
+        totals = np.percentile(samples.sum(axis=1), percentiles)
+        result = {name: {f'p{p}': float(values[i, column]) for i, p in enumerate(percentiles)}
+                  for column, name in enumerate(self.phases)}
+        result['frame'] = {f'p{p}': float(totals[i]) for i, p in enumerate(percentiles)}
+        return result
+
+    def histogram(self, phase=None, bins=10, budget=1 / 60):
+        """(cuentas, bordes en ms) del frame o de una fase, de 0 al doble del presupuesto
+
+        Los frames que pasan del doble del presupuesto caen en el último cubo.
+        """
+        samples = self.recent()
+        values = samples.sum(axis=1) if phase is None else samples[:, self.phases.index(phase)]
+        limit = 2000 * budget
+        return np.histogram(np.minimum(values, limit), bins=bins, range=(0, limit))
+
+    def over_budget(self, budget=1 / 60):
+        """Fracción de los frames recientes que superan el presupuesto"""
+        if not self.count:
+            return 0.0
+        return float((self.totals() > budget * 1000).mean())
+
+    def report(self, budget=1 / 60):
+        """Resumen en texto: percentiles por fase y frames fuera de presupuesto"""
+        stats = self.percentiles()
+        if not stats:
+            return "Perfilador: sin frames medidos"
+        lines = [f"Perfilador: {self.count} frames, {self.over_budget(budget):.0%} "
+                 f"por encima de {budget * 1000:.1f} ms"]
+        for name, values in sorted(stats.items(), key=lambda item: -item[1]['p90']):
+            lines.append(f"  {name:<10} " + "  ".join(f"{key} {value:6.2f}"
+                                                      for key, value in values.items()))
+        return "\n".join(lines)
+
+
+profiler = FrameProfiler(enabled=bool(os.environ.get(PROFILE_ENV)))
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+Overlay del perfilador: una gráfica de barras apiladas con el tiempo de cada
+fase en los últimos frames (un MeshBatch por fase), la línea del presupuesto
+y una leyenda con los percentiles. F3 lo muestra u oculta y, con él, enciende
+o apaga la medición.
+"""
+
+import numpy as np
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics import Color, InstructionGroup, Line, Rectangle
+from kivy.uix.label import Label
+from kivy.uix.widget import Widget
+
+from batch import FULL_UV, MeshBatch
+from profiler import profiler as default_profiler
+
+TOGGLE_KEY = 284  # F3
+REFRESH_INTERVAL = 0.1
+LEGEND_INTERVAL = 0.5
+GRAPH_SIZE = (240, 90)
+PHASE_COLORS = (
+    (0.6, 0.6, 0.6),  # other
+    (0.2, 0.6, 1.0),
+    (1.0, 0.4, 0.2),
+    (0.3, 0.9, 0.3),
+    (1.0, 0.85, 0.2),
+    (0.8, 0.3, 0.9),
+    (0.2, 0.9, 0.9),
+    (1.0, 0.5, 0.7),
+)
+
+
+class ProfilerOverlay(Widget):
+    """Gráfica por fases del FrameProfiler, dibujada encima de todo"""
+
+    def __init__(self, profiler=default_profiler, budget=1 / 60, **kwargs):
+        kwargs.setdefault('size_hint', (None, None))
+        kwargs.setdefault('size', GRAPH_SIZE)
+        super().__init__(**kwargs)
+        self.profiler = profiler
+        self.budget = budget
+        self.batches = []  # Un lote de barras por fase, en el orden de profiler.phases
+        self._legend_time = 0.0
+        with self.canvas:
+            Color(0, 0, 0, 0.6)
+            self.background = Rectangle(pos=self.pos, size=self.size)
+        self.bars = InstructionGroup()  # Los lotes de cada fase se añaden al aparecer
+        self.canvas.add(self.bars)
+        with self.canvas.after:
+            Color(1, 0.2, 0.2, 1)
+            self.budget_line = Line(points=[], width=1)
+        self.legend = Label(size_hint=(None, None), halign='left', font_size=11, markup=True)
+        self.legend.bind(texture_size=self.legend.setter('size'), size=self._layout)
+        self.add_widget(self.legend)
+        self.bind(pos=self._layout, size=self._layout)
+        Window.bind(size=self._dock)
+        Window.bind(on_key_down=self._on_key_down)
+        self._dock()
+        self._show(profiler.enabled)
+
+    def _dock(self, *args):
+        # Esquina superior izquierda de la ventana
+        self.pos = (0, Window.height - self.height)
+
+    def _layout(self, *args):
+        self.background.pos = self.pos
+        self.background.size = self.size
+        budget_y = self.y + self.height / 2  # El gráfico llega al doble del presupuesto
+        self.budget_line.points = [self.x, budget_y, self.right, budget_y]
+        self.legend.pos = (self.x + 4, self.y - self.legend.height)
+
+    def _on_key_down(self, window, key, *args):
+        if key == TOGGLE_KEY:
+            self.toggle()
+            return True
+        return False
+
+    def toggle(self):
+        enabled = not self.profiler.enabled
+        if not enabled:
+            print(self.profiler.report(self.budget))
+        self.profiler.set_enabled(enabled)
+        self._show(enabled)
+
+    def _show(self, visible):
+        self.opacity = 1 if visible else 0
+        Clock.unschedule(self.refresh)
+        if visible:
+            Clock.schedule_interval(self.refresh, REFRESH_INTERVAL)
+
+    def _phase_batch(self, column):
+        while len(self.batches) <= column:
+            r, g, b = PHASE_COLORS[len(self.batches) % len(PHASE_COLORS)]
+            batch = MeshBatch(capacity=self.profiler.capacity)
+            self.bars.add(Color(r, g, b, 0.9))
+            self.bars.add(batch.mesh)
+            self.batches.append(batch)
+        return self.batches[column]
+
+    def refresh(self, dt):
+        """Redibuja las barras apiladas y, cada medio segundo, la leyenda"""
+        samples = self.profiler.recent()
+        if not len(samples):
+            return
+        count, phases = samples.shape
+        scale = self.height / (2000 * self.budget)  # px por ms
+        bar_width = self.width / self.profiler.capacity
+        xs = self.x + self.width - (count - np.arange(count)) * bar_width
+        tops = np.minimum(np.cumsum(samples, axis=1) * scale, self.height)
+        bottoms = np.hstack([np.zeros((count, 1)), tops[:, :-1]])
+        uvs = np.tile(np.array(FULL_UV, dtype=np.float32), (count, 1))
+        for column in range(phases):
+            rects = np.stack([xs, self.y + bottoms[:, column], np.full(count, bar_width),
+                              tops[:, column] - bottoms[:, column]], axis=1)
+            batch = self._phase_batch(column)
+            batch.set_instances(rects, uvs)
+            batch.flush()
+
+        self._legend_time += dt
+        if self._legend_time >= LEGEND_INTERVAL:
+            self._legend_time = 0.0
+            self.update_legend()
+
+    def update_legend(self):
+        stats = self.profiler.percentiles()
+        lines = [f"frame p50 {stats['frame']['p50']:.1f}  p99 {stats['frame']['p99']:.1f} ms  "
+                 f"{self.profiler.over_budget(self.budget):.0%} > {self.budget * 1000:.0f} ms"]
+        for column, name in enumerate(self.profiler.phases):
+            r, g, b = PHASE_COLORS[column % len(PHASE_COLORS)]
+            color = f"{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+            lines.append(f"[color={color}]{name}[/color] p50 {stats[name]['p50']:.2f}  "
+                         f"p99 {stats[name]['p99']:.2f}")
+        self.legend.text = "\n".join(lines)
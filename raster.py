@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rasterizador de sprites procedurales sobre arrays de NumPy.
+
+Cada lienzo es un array uint8[alto, ancho, 4] (RGBA). Las primitivas pintan
+regiones completas con operaciones vectorizadas y el resultado se entrega a
+Texture.blit_buffer con un único tobytes().
+"""
+
+import numpy as np
+
+
+class PixelCanvas:
+    """Lienzo RGBA de NumPy con primitivas de relleno vectorizadas"""
+
+    def __init__(self, width, height, fill=(0, 0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.pixels = np.empty((height, width, 4), dtype=np.uint8)
+        self.pixels[:] = fill
+
+    @classmethod
+    def frombuffer(cls, buffer, width, height):
+        """Reconstruye un lienzo a partir de un buffer RGBA (p. ej. desde la caché)"""
+        canvas = cls.__new__(cls)
+        canvas.width = width
+        canvas.height = height
+        canvas.pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4).copy()
+        return canvas
+
+    def _grid(self, x0, y0, x1, y1):
+        """Devuelve coordenadas (xs, ys) listas para broadcasting en la región"""
+        xs = np.arange(x0, x1)[np.newaxis, :]
+        ys = np.arange(y0, y1)[:, np.newaxis]
+        return xs, ys
+
+    def set_pixel(self, x, y, color):
+        """Pinta un único píxel"""
+        self.pixels[y, x] = color
+
+    def fill_rect(self, x0, y0, x1, y1, color):
+        """Rellena el rectángulo [x0, x1) x [y0, y1)"""
+        self.pixels[y0:y1, x0:x1] = color
+
+    def fill_mask(self, x0, y0, x1, y1, predicate, color):
+        """Rellena los píxeles de la región donde predicate(xs, ys) es verdadero"""
+        xs, ys = self._grid(x0, y0, x1, y1)
+        mask = np.broadcast_to(predicate(xs, ys), (y1 - y0, x1 - x0))
+        self.pixels[y0:y1, x0:x1][mask] = color
+
+    def fill_ellipse(self, x0, y0, x1, y1, cx, cy, limit, color, sx=1, sy=1):
+        """Rellena (x-cx)**2/sx + (y-cy)**2/sy < limit dentro de la región"""
+        self.fill_mask(
+            x0, y0, x1, y1,
+            lambda xs, ys: (xs - cx) ** 2 / sx + (ys - cy) ** 2 / sy < limit,
+            color
+        )
+
+    def fill_taper(self, x0, y0, x1, y1, cx, half_width, slope, color):
+        """Rellena abs(x-cx) < half_width - (y-y0)/slope (piernas que se estrechan)"""
+        self.fill_mask(
+            x0, y0, x1, y1,
+            lambda xs, ys: np.abs(xs - cx) < half_width - (ys - y0) / slope,
+            color
+        )
+
+    def fill_columns(self, xs, tops, color):
+        """Rellena cada columna xs[i] desde la fila tops[i] hasta la última fila
+
+        Los índices de columna negativos se envuelven igual que en las listas de
+        Python, para que los fondos existentes conserven su aspecto.
+        """
+        xs = np.mod(np.asarray(xs), self.width)
+        tops = np.asarray(tops)
+        rows = np.arange(self.height)[:, np.newaxis]
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        # Las columnas repetidas acumulan sus tramos en lugar de pisarse
+        np.logical_or.at(mask.T, xs, (rows >= tops[np.newaxis, :]).T)
+        self.pixels[mask] = color
+
+    def tobytes(self):
+        """Devuelve el buffer RGBA fila por fila"""
+        return self.pixels.tobytes()
+
+    def to_texture(self):
+        """Sube el lienzo a una textura de Kivy"""
+        return texture_from_buffer(self.tobytes(), self.width, self.height)
+
+
+def texture_from_buffer(buffer, width, height):
+    """Crea una textura RGBA de Kivy a partir de un buffer de bytes"""
+    from kivy.graphics.texture import Texture
+
+    texture = Texture.create(size=(width, height), colorfmt='rgba')
+    texture.blit_buffer(buffer, colorfmt='rgba', bufferfmt='ubyte')
+    return texture
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+Grabación y reproducción deterministas de partidas.
+
+Cada subsistema (mapa, combate, puzzle...) saca sus números aleatorios de su
+propio random.Random derivado de la semilla de la partida, así que el mismo
+azar de un subsistema no depende de cuánto consumieron los demás. Las
+entradas se guardan por tick en un registro binario compacto; con la misma
+semilla y las mismas entradas la simulación a paso fijo llega al mismo
+estado bit a bit, con o sin ventana.
+
+Grabar desde el juego: MONTANA_RECORD=partida.rep python main.py
+Reproducir con ventana: MONTANA_REPLAY=partida.rep python main.py
+Reproducir sin ventana (huella del estado final y ticks por segundo):
+    python replay.py partida.rep
+"""
+
+import hashlib
+import os
+import random
+import struct
+import sys
+from time import perf_counter
+
+MAGIC = b'MREP'
+VERSION = 2
+HEADER = struct.Struct('<4sHQdIIII')  # magia, versión, semilla, dt, vista (ancho, alto), ticks, nombres
+RECORD = struct.Struct('<IB')  # tick, número de comandos
+COMMAND = struct.Struct('<BB')  # índice del nombre, número de argumentos
+RECORD_ENV = 'MONTANA_RECORD'
+REPLAY_ENV = 'MONTANA_REPLAY'
+
+
+def new_seed():
+    """Semilla nueva de 63 bits para una partida"""
+    return random.SystemRandom().getrandbits(63)
+
+
+class RandomStreams:
+    """Un random.Random por subsistema, derivado de la semilla de la partida"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self._streams = {}
+
+    def __getitem__(self, name):
+        stream = self._streams.get(name)
+        if stream is None:
+            digest = hashlib.sha256(f"{self.seed}:{name}".encode()).digest()
+            stream = self._streams[name] = random.Random(int.from_bytes(digest[:8], 'little'))
+        return stream
+
+
+def _pack_text(text):
+    data = text.encode()
+    return struct.pack('<H', len(data)) + data
+
+
+def _unpack_text(data, offset):
+    size, = struct.unpack_from('<H', data, offset)
+    offset += 2
+    return data[offset:offset + size].decode(), offset + size
+
+
+def _pack_arg(value):
+    # bool antes que int: True es un int para Python
+    if isinstance(value, bool):
+        return b'b' + struct.pack('<?', value)
+    if isinstance(value, int):
+        return b'i' + struct.pack('<q', value)
+    if isinstance(value, float):
+        return b'd' + struct.pack('<d', value)  # float64: exacto al reproducir
+    if isinstance(value, str):
+        return b's' + _pack_text(value)
+    raise TypeError(f"Argumento de comando no grabable: {value!r}")
+
+
+def _unpack_arg(data, offset):
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b'b':
+        return struct.unpack_from('<?', data, offset)[0], offset + 1
+    if tag == b'i':
+        return struct.unpack_from('<q', data, offset)[0], offset + 8
+    if tag == b'd':
+        return struct.unpack_from('<d', data, offset)[0], offset + 8
+    if tag == b's':
+        return _unpack_text(data, offset)
+    raise ValueError(f"Tipo de argumento desconocido en el registro: {tag!r}")
+
+
+class InputLog:
+    """Entradas de una partida por tick, con su semilla, juego, paso fijo y vista
+
+    La vista (ancho, alto de la ventana) se guarda porque la cámara de la
+    simulación depende de ella; (0, 0) si el juego no la usa.
+    """
+
+    def __init__(self, game, seed, dt, view_size=(0, 0)):
+        self.game = game
+        self.seed = seed
+        self.dt = dt
+        self.view_size = tuple(int(v) for v in view_size)
+        self.ticks = 0  # Duración total de la partida en ticks
+        self.records = {}  # tick -> lista de comandos
+
+    def record(self, tick, inputs):
+        if inputs:
+            self.records[tick] = [tuple(command) for command in inputs]
+        self.ticks = max(self.ticks, tick + 1)
+
+    def inputs_at(self, tick):
+        return self.records.get(tick, ())
+
+    def to_bytes(self):
+        names = sorted({command[0] for commands in self.records.values() for command in commands})
+        index = {name: i for i, name in enumerate(names)}
+        parts = [HEADER.pack(MAGIC, VERSION, self.seed, self.dt, *self.view_size, self.ticks, len(names)),
+                 _pack_text(self.game)]
+        parts.extend(_pack_text(name) for name in names)
+        for tick in sorted(self.records):
+            commands = self.records[tick]
+            parts.append(RECORD.pack(tick, len(commands)))
+            for name, *args in commands:
+                parts.append(COMMAND.pack(index[name], len(args)))
+                parts.extend(_pack_arg(arg) for arg in args)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError("No es un registro de partida compatible")
+        magic, version, seed, dt, width, height, ticks, name_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("No es un registro de partida compatible")
+        offset = HEADER.size
+        game, offset = _unpack_text(data, offset)
+        names = []
+        for _ in range(name_count):
+            name, offset = _unpack_text(data, offset)
+            names.append(name)
+        log = cls(game, seed, dt, (width, height))
+        log.ticks = ticks
+        while offset < len(data):
+            tick, count = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            commands = []
+            for _ in range(count):
+                name_index, argc = COMMAND.unpack_from(data, offset)
+                offset += COMMAND.size
+                args = []
+                for _ in range(argc):
+                    arg, offset = _unpack_arg(data, offset)
+                    args.append(arg)
+                commands.append((names[name_index], *args))
+            log.records[tick] = commands
+        return log
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+class Session:
+    """Una simulación con su registro: graba las entradas o las reproduce
+
+    Al reproducir se ignoran las entradas en vivo y se usan las del registro;
+    los ticks posteriores a la grabación avanzan sin entradas.
+    """
+
+    def __init__(self, sim, log, replaying=False, path=None):
+        self.sim = sim
+        self.log = log
+        self.replaying = replaying
+        self.path = path  # Donde se guarda la grabación al cerrar
+        self.tick = 0
+
+    @property
+    def finished(self):
+        return self.replaying and self.tick >= self.log.ticks
+
+    def step(self, dt, inputs=()):
+        if self.replaying:
+            inputs = self.log.inputs_at(self.tick)
+        elif self.log is not None:
+            self.log.record(self.tick, inputs)
+        self.tick += 1
+        return self.sim.step(dt, inputs)
+
+    def close(self):
+        """Guarda la grabación (si la hay) y devuelve la huella del estado"""
+        if self.log is not None and not self.replaying and self.path:
+            self.log.save(self.path)
+        return self.sim.digest()
+
+
+def session_from_env(game, factory, dt, view_size=(0, 0)):
+    """Sesión según MONTANA_REPLAY / MONTANA_RECORD; sin ellas, una partida normal
+
+    factory(seed, view_size) crea la simulación del juego. Al reproducir se
+    usa la vista grabada, no la de la ventana actual.
+    """
+    replay_path = os.environ.get(REPLAY_ENV)
+    if replay_path:
+        log = InputLog.load(replay_path)
+        if log.game != game:
+            raise ValueError(f"El registro es de '{log.game}', no de '{game}'")
+        return Session(factory(log.seed, log.view_size), log, replaying=True)
+    record_path = os.environ.get(RECORD_ENV)
+    if record_path:
+        seed = new_seed()
+        log = InputLog(game, seed, dt, view_size)
+        return Session(factory(seed, log.view_size), log, path=record_path)
+    return Session(factory(None, view_size), None)
+
+
+def simulation_factories():
+    """Juego -> constructor de su simulación sin ventana: factory(seed, view_size)"""
+    from mastur_sim import Simulacion
+    from simulation import GameSimulation
+    return {'main': lambda seed, view_size: GameSimulation(view_size=view_size, seed=seed),
+            'mastur': lambda seed, view_size: Simulacion(semilla=seed)}
+
+
+def replay(log, factory=None):
+    """Reproduce un registro sin ventana; devuelve (simulación, segundos)"""
+    factory = factory or simulation_factories()[log.game]
+    session = Session(factory(log.seed, log.view_size), log, replaying=True)
+    start = perf_counter()
+    while not session.finished:
+        session.step(log.dt)
+    return session.sim, perf_counter() - start
+
+
+if __name__ == '__main__':
+    log = InputLog.load(sys.argv[1])
+    sim, seconds = replay(log)
+    print(f"{log.game}: {log.ticks} ticks en {seconds:.2f}s ({log.ticks / max(seconds, 1e-9):.0f} ticks/s)")
+    print(f"huella: {sim.digest()}")
@@ -0,0 +1,969 @@
+# -*- coding: utf-8 -*-
+
+"""
+Simulación sin ventana del RPG de main.py: mapa, movimiento, colisiones,
+persecución de enemigos, diálogos, combate, puzzle de memoria y tienda.
+
+No importa Kivy. Las pantallas de main.py son vistas finas: envían comandos
+con GameSimulation.step(dt, inputs) y reaccionan a los eventos del estado
+que devuelve. Así la lógica corre igual en un CI, a miles de ticks por
+segundo:
+
+    sim = GameSimulation()
+    for _ in range(1000):
+        state = sim.step(1 / 60, [('move', 2, 0)])
+"""
+
+import hashlib
+from collections import deque
+
+from entities import Data, EntityStore, EntityView, Field
+from gameloop import Timers
+from navigation import NAV_CELL, FlowField, NavGrid
+from profiler import profiler
+from replay import RandomStreams, new_seed
+from spatial import SpatialHash
+
+TILE_SIZE = 32  # Tamaño estándar para sprites en pixel art
+PLAYER_SPEED = 2  # Velocidad de movimiento del jugador
+COLLISION_PRIORITY = {'npc': 0, 'item': 1, 'enemy': 2}
+ENEMY_CHASE_RADIUS = 300  # Distancia a la que un enemigo empieza a perseguir
+ENEMY_ROUTE_CELLS = 2 * ENEMY_CHASE_RADIUS // NAV_CELL  # Alcance del campo de flujo, con margen para rodear
+ENEMY_SPEED_SCALE = 5  # Píxeles por segundo por punto de velocidad del enemigo
+MAP_SIZE = (2000, 2000)  # Tamaño del mapa (más grande que la pantalla)
+VIEW_SIZE = (480, 800)  # Ventana de la cámara (la de main.py en escritorio)
+
+# Definición de personajes
+CHARACTERS = {
+    'alan': {
+        'name': 'Alan',
+        'description': 'El valiente',
+        'attack_type': 'golpe_fierro',
+        'max_health': 100,
+        'max_mana': 50,
+        'attack': 15,
+        'defense': 8,
+        'speed': 10
+    },
+    'alexis': {
+        'name': 'Alexis',
+        'description': 'El inteligente',
+        'attack_type': 'cuchillo',
+        'max_health': 80,
+        'max_mana': 70,
+        'attack': 12,
+        'defense': 10,
+        'speed': 12
+    },
+    'joaquin': {
+        'name': 'Joaquín',
+        'description': 'El cómico',
+        'attack_type': 'patada',
+        'max_health': 90,
+        'max_mana': 60,
+        'attack': 18,
+        'defense': 6,
+        'speed': 14
+    }
+}
+
+# Definición de enemigos
+ENEMIES = {
+    'lobo': {
+        'name': 'Lobo Salvaje',
+        'health': 40,
+        'attack': 8,
+        'defense': 5,
+        'speed': 7,
+        'xp': 15,
+        'gold': 5
+    },
+    'oso': {
+        'name': 'Oso Pardo',
+        'health': 70,
+        'attack': 12,
+        'defense': 8,
+        'speed': 5,
+        'xp': 30,
+        'gold': 15
+    },
+    'monstruo': {
+        'name': 'Monstruo Ancestral',
+        'health': 150,
+        'attack': 20,
+        'defense': 15,
+        'speed': 10,
+        'xp': 100,
+        'gold': 50
+    }
+}
+
+# Definición de items
+ITEMS = {
+    'pocion_salud': {
+        'name': 'Poción de Salud',
+        'description': 'Restaura 30 puntos de salud',
+        'type': 'consumable',
+        'effect': {'health': 30},
+        'price': 20
+    },
+    'pocion_mana': {
+        'name': 'Poción de Mana',
+        'description': 'Restaura 20 puntos de mana',
+        'type': 'consumable',
+        'effect': {'mana': 20},
+        'price': 15
+    },
+    'comida': {
+        'name': 'Comida de Montaña',
+        'description': 'Restaura 15 puntos de energía',
+        'type': 'consumable',
+        'effect': {'energy': 15},
+        'price': 10
+    },
+    'espada': {
+        'name': 'Espada Rota',
+        'description': 'Mejora el ataque en 5 puntos',
+        'type': 'equipment',
+        'effect': {'attack': 5},
+        'price': 50
+    }
+}
+
+STORE_ITEMS = ['pocion_salud', 'pocion_mana', 'comida', 'espada']
+
+# Colores del terreno (los dibuja la vista)
+GRASS_COLOR = (0.3, 0.6, 0.2, 1)
+PATH_COLOR = (0.6, 0.5, 0.3, 1)  # Tierra
+ROCK_COLOR = (0.4, 0.4, 0.4, 1)
+TREE_COLOR = (0.2, 0.5, 0.2, 1)
+
+
+class Character(EntityView):
+    """Representa un personaje jugable"""
+
+    health = Field('health')
+    max_health = Field('max_health')
+    mana = Field('mana')
+    max_mana = Field('max_mana')
+    attack = Field('attack')
+    defense = Field('defense')
+    speed = Field('speed')
+    char_id = Data()
+    name = Data()
+
+    # Estado de animación
+    anim_direction = Data()
+    anim_state = Data()  # idle, walking, attacking
+
+    def __init__(self, store, char_id, name, max_health, max_mana, attack, defense, speed):
+        super().__init__(
+            store, sprite=('character', char_id),
+            width=TILE_SIZE, height=TILE_SIZE * 2,  # Tamaño del sprite (más alto que ancho)
+            health=max_health, max_health=max_health, mana=max_mana, max_mana=max_mana,
+            attack=attack, defense=defense, speed=speed,
+            char_id=char_id, name=name, anim_direction='down', anim_state='idle'
+        )
+
+    def move(self, dx, dy):
+        """Mueve al personaje en la dirección dada"""
+        if dx != 0 or dy != 0:
+            self.anim_state = 'walking'
+
+            # Determinar dirección para la animación
+            if abs(dx) > abs(dy):
+                self.anim_direction = 'right' if dx > 0 else 'left'
+            else:
+                self.anim_direction = 'down' if dy > 0 else 'up'
+        else:
+            self.anim_state = 'idle'
+
+        # Actualizar posición
+        self.pos = (self.x + dx, self.y + dy)
+
+    def update_sprite(self, animation_frame=0):
+        """Actualiza el frame del sprite según su estado"""
+        # Caminando se usa el frame actual de animación del mapa
+        self.frame = animation_frame if self.anim_state == 'walking' else 0
+
+    def attack_enemy(self, enemy):
+        """Ataca a un enemigo"""
+        damage = max(1, self.attack - enemy.defense)
+        enemy.health = max(0, enemy.health - damage)
+        return damage
+
+    def take_damage(self, damage):
+        """Recibe daño"""
+        actual_damage = max(1, damage - self.defense)
+        self.health = max(0, self.health - actual_damage)
+        return actual_damage
+
+
+class NPC(EntityView):
+    """Representa un personaje no jugable (NPC)"""
+
+    name = Data()
+    dialogue = Data()
+
+    def __init__(self, store, name, dialogue):
+        super().__init__(store, sprite=('character', 'npc'),
+                         width=TILE_SIZE, height=TILE_SIZE * 2,
+                         name=name, dialogue=dialogue)
+
+
+class Item(EntityView):
+    """Representa un item recolectable"""
+
+    item_id = Data()
+    name = Data()
+    description = Data()
+
+    def __init__(self, store, item_id, name, description):
+        super().__init__(store, sprite=('item', item_id),
+                         width=TILE_SIZE, height=TILE_SIZE,
+                         item_id=item_id, name=name, description=description)
+
+
+class Enemy(EntityView):
+    """Representa un enemigo"""
+
+    health = Field('health')
+    max_health = Field('max_health')
+    attack = Field('attack')
+    defense = Field('defense')
+    speed = Field('speed')
+    gold = Field('gold')
+    enemy_id = Data()
+    name = Data()
+
+    def __init__(self, store, enemy_id, name, health, max_health, attack, defense, speed, gold=0):
+        super().__init__(store, sprite=('enemy', enemy_id),
+                         width=TILE_SIZE * 1.5, height=TILE_SIZE * 1.5,  # Enemigos pueden ser más grandes
+                         health=health, max_health=max_health, attack=attack,
+                         defense=defense, speed=speed, gold=gold,
+                         enemy_id=enemy_id, name=name)
+
+
+class Combat:
+    """Combate por turnos entre el personaje actual y un enemigo"""
+
+    def __init__(self, sim, character_id, enemy_id):
+        self.sim = sim
+        self.character_id = character_id
+        self.enemy_id = enemy_id
+        self.char = sim.characters[character_id]
+        self.enemy = sim.enemies[enemy_id]
+        self.player_turn = True
+        self.finished = False  # Hay un final de combate programado
+        self.message = f"¡{self.enemy.name} te ataca!"
+
+    def say(self, message):
+        self.message = message
+        self.sim.emit('combat', message)
+
+    def attack(self):
+        """El jugador ataca al enemigo"""
+        if not self.player_turn or self.finished:
+            return
+
+        # Calcular daño
+        damage = self.char.attack_enemy(self.enemy)
+        self.say(f"¡Has hecho {damage} puntos de daño!")
+
+        # Verificar si el enemigo fue derrotado
+        if self.enemy.health <= 0:
+            self.finished = True
+            self.sim.timers.schedule(1.5, self.end_combat)
+            return
+
+        # Cambiar de turno
+        self.player_turn = False
+        self.sim.timers.schedule(1.0, self.enemy_turn)
+
+    def defend(self):
+        """El jugador se defiende"""
+        if not self.player_turn or self.finished:
+            return
+
+        # Aumentar temporalmente la defensa
+        char = self.char
+        char.defense *= 1.5
+        self.say("¡Te has defendido!")
+
+        # Cambiar de turno
+        self.player_turn = False
+        self.sim.timers.schedule(0.5, lambda: self.end_defense(char))
+        self.sim.timers.schedule(1.0, self.enemy_turn)
+
+    def end_defense(self, char):
+        """Restaura la defensa después de defender"""
+        char.defense = char.defense / 1.5
+
+    def use_item(self):
+        """El jugador usa un objeto"""
+        if not self.player_turn or self.finished:
+            return
+
+        inventory = self.sim.inventory
+        if not inventory:
+            self.say("¡No tienes objetos!")
+            return
+
+        # Usar el primer objeto disponible (simplificado)
+        item_id = next(iter(inventory))
+        item = ITEMS[item_id]
+
+        # Aplicar efecto
+        if 'health' in item['effect']:
+            char = self.char
+            char.health = min(char.max_health, char.health + item['effect']['health'])
+            inventory[item_id] -= 1
+            if inventory[item_id] <= 0:
+                del inventory[item_id]
+
+        self.say(f"¡Has usado {item['name']}!")
+        self.sim.emit('hud')
+
+        # Cambiar de turno
+        self.player_turn = False
+        self.sim.timers.schedule(1.0, self.enemy_turn)
+
+    def run_away(self):
+        """El jugador intenta huir del combate"""
+        if self.finished:
+            return
+
+        # Probabilidad de huir basada en la velocidad
+        flee_chance = min(0.8, self.char.speed / (self.char.speed + self.enemy.speed))
+
+        if self.sim.rng['combat'].random() < flee_chance:
+            self.say("¡Has escapado exitosamente!")
+            self.finished = True
+            self.sim.timers.schedule(1.5, self.end_combat)
+        else:
+            self.say("¡No pudiste escapar!")
+            self.sim.timers.schedule(1.5, self.enemy_turn)
+
+    def enemy_turn(self):
+        """Turno del enemigo"""
+        if self.finished:
+            return
+
+        # El enemigo ataca
+        actual_damage = self.char.take_damage(self.enemy.attack)
+        self.say(f"¡{self.enemy.name} te hizo {actual_damage} puntos de daño!")
+
+        # Verificar si el jugador fue derrotado
+        if self.char.health <= 0:
+            self.finished = True
+            self.sim.timers.schedule(1.5, self.game_over)
+            return
+
+        # Cambiar de turno
+        self.player_turn = True
+
+    def end_combat(self):
+        """Finaliza el combate con victoria del jugador"""
+        sim = self.sim
+
+        # Otorgar recompensas
+        sim.gold += self.enemy.gold
+        # En un proyecto real, se añadiría XP y posiblemente items
+
+        # Eliminar enemigo del mapa
+        sim.remove_entity('enemy', self.enemy_id)
+        sim.end_combat('won')
+
+    def game_over(self):
+        """Maneja el final del juego por derrota"""
+        # Revivir con 20% de salud
+        self.char.health = self.char.max_health * 0.2
+        self.sim.end_combat('lost')
+
+
+class MemoryPuzzle:
+    """Juego de memoria: repetir una secuencia de botones de la cuadrícula"""
+
+    size = 3
+
+    def __init__(self, sim, level=1):
+        self.sim = sim
+        self.level = level
+        self.sequence = []
+        self.player_sequence = []
+        self.showing_sequence = False
+        self.shown = 0
+
+    def start(self):
+        """Genera una secuencia nueva y programa su presentación"""
+        self.showing_sequence = True
+        self.player_sequence = []
+        self.shown = 0
+
+        # La secuencia crece con el nivel
+        rng = self.sim.rng['puzzle']
+        self.sequence = [rng.randint(0, self.size * self.size - 1)
+                         for _ in range(self.level + 2)]
+        self.sim.emit('puzzle_started', self.size)
+        self.sim.emit('puzzle_message', "Observa la secuencia...")
+
+        # Mostrar la secuencia
+        self.sim.timers.schedule(1.0, self.show_next)
+
+    def show_next(self):
+        """Resalta el siguiente botón de la secuencia"""
+        if self.shown == len(self.sequence):
+            self.showing_sequence = False
+            self.sim.emit('puzzle_message', "¡Tu turno!")
+            return
+
+        index = self.sequence[self.shown]
+        self.shown += 1
+        self.sim.emit('puzzle_show', index)
+
+        def hide():
+            self.sim.emit('puzzle_hide', index)
+            self.sim.timers.schedule(0.5, self.show_next)
+
+        self.sim.timers.schedule(0.7, hide)
+
+    def press(self, index):
+        """Botón pulsado por el jugador"""
+        if self.showing_sequence:
+            return
+
+        self.player_sequence.append(index)
+
+        # Verificar la secuencia
+        if self.player_sequence == self.sequence[:len(self.player_sequence)]:
+            if len(self.player_sequence) == len(self.sequence):
+                # Secuencia completa correcta
+                self.showing_sequence = True  # No acepta más pulsaciones
+                self.sim.emit('puzzle_message', "¡Correcto! Nivel completado.")
+                self.sim.timers.schedule(1.5, self.sim.end_memory_puzzle)
+        else:
+            # Error en la secuencia
+            self.showing_sequence = True
+            self.sim.emit('puzzle_message', "¡Secuencia incorrecta!")
+            self.sim.timers.schedule(1.5, self.start)
+
+
+class GameSimulation:
+    """Estado completo de una partida, avanzado tick a tick con step()"""
+
+    def __init__(self, map_size=MAP_SIZE, view_size=VIEW_SIZE, seed=None):
+        # Azar por subsistema: con la misma semilla y entradas, la misma partida
+        self.seed = seed if seed is not None else new_seed()
+        self.rng = RandomStreams(self.seed)
+        self.map_size = map_size
+        self.view_size = view_size
+        self.store = EntityStore()
+        self.store.move_listeners.append(self._on_entity_moved)
+        self.entity_index = SpatialHash()
+        self._entity_keys = {}  # id en el almacén -> (tipo, id de entidad)
+        self.characters = {}
+        self.npcs = {}
+        self.items = {}
+        self.enemies = {}
+        self.terrain = []  # (color, x, y, ancho, alto) del suelo y los obstáculos
+        self.timers = Timers()
+        self.events = []
+        self.tick = 0
+
+        self.current_character = 'alan'
+        self.game_state = 'exploring'  # exploring, combat, puzzle, dialogue, store
+        self.inventory = {
+            'pocion_salud': 3,
+            'pocion_mana': 2,
+            'comida': 5
+        }
+        self.gold = 50
+        self.current_mission = "Escapa de la montaña"
+        self.dialogue_queue = deque()
+        self.dialogue_npc = None
+        self.dialogue_text = ''
+        self.combat = None
+        self.puzzle = None
+        self.puzzle_level = 1
+
+        self.camera_x = 0
+        self.camera_y = 0
+        self.target_camera_x = 0
+        self.target_camera_y = 0
+        self.prev_camera = (0, 0)
+        self.camera_speed = 5
+        self.animation_frame = 0
+        self.animation_time = 0
+
+        self.commands = {
+            'move': self.move,
+            'interact': self.interact,
+            'jump': self.jump,
+            'push': self.push,
+            'switch_character': self.switch_character,
+            'next_dialogue': self.next_dialogue,
+            'close_dialogue': self.close_dialogue,
+            'attack': lambda: self.combat and self.combat.attack(),
+            'defend': lambda: self.combat and self.combat.defend(),
+            'use_item': lambda: self.combat and self.combat.use_item(),
+            'run_away': lambda: self.combat and self.combat.run_away(),
+            'start_puzzle': self.start_memory_puzzle,
+            'puzzle_press': lambda index: self.puzzle and self.puzzle.press(index),
+            'start_store': self.start_store,
+            'buy': self.buy_item,
+            'close_store': self.close_store
+        }
+
+        self.create_map()
+
+    # === Mapa ===
+
+    def create_map(self):
+        """Crea un mapa simple con terreno y objetos"""
+        rng = self.rng['map']
+        # Rejilla de navegación: rocas y árboles bloquean el paso a los enemigos
+        self.nav_grid = NavGrid(*self.map_size)
+
+        # Fondo del mapa
+        self.terrain.append((GRASS_COLOR, 0, 0, *self.map_size))  # Verde para el pasto
+
+        # Caminos: el principal y el transversal
+        self.terrain.append((PATH_COLOR, 500, 0, 200, 2000))
+        self.terrain.append((PATH_COLOR, 0, 800, 2000, 200))
+
+        # Rocas
+        for i in range(10):
+            x = rng.randint(100, 1900)
+            y = rng.randint(100, 1900)
+            size = rng.randint(30, 80)
+            self.terrain.append((ROCK_COLOR, x, y, size, size))
+            self.nav_grid.block_rect(x, y, size, size, margin=TILE_SIZE / 2)
+
+        # Árboles
+        for i in range(30):
+            x = rng.randint(50, 1950)
+            y = rng.randint(50, 1950)
+            size = rng.randint(20, 40)
+            self.terrain.append((TREE_COLOR, x, y, size, size * 2))
+            self.nav_grid.block_rect(x, y, size, size * 2, margin=TILE_SIZE / 2)
+        # Campo de flujo hacia el jugador, compartido por todos los enemigos
+        self.flow_field = FlowField(self.nav_grid, max_distance=ENEMY_ROUTE_CELLS)
+
+        self.create_characters()
+        self.create_npcs()
+        self.create_items()
+        self.create_enemies()
+
+    def create_characters(self):
+        """Crea los personajes jugables"""
+        for char_id, char_data in CHARACTERS.items():
+            char = Character(
+                self.store,
+                char_id=char_id,
+                name=char_data['name'],
+                max_health=char_data['max_health'],
+                max_mana=char_data['max_mana'],
+                attack=char_data['attack'],
+                defense=char_data['defense'],
+                speed=char_data['speed']
+            )
+            char.pos = (100, 100) if char_id == 'alan' else (150, 100)
+            char.visible = (char_id == 'alan')  # Solo el primero es visible al inicio
+            self.characters[char_id] = char
+
+    def create_npcs(self):
+        """Crea NPCs en el mapa"""
+        # Ejemplo de NPC
+        npc = NPC(
+            self.store,
+            name="Montañista Perdido",
+            dialogue=[
+                "¡Ayuda! Me he perdido en esta montaña.",
+                "Dicen que hay un monstruo ancestral en lo profundo de la cueva...",
+                "Si encuentras mi mochila, te daré algo a cambio."
+            ]
+        )
+        npc.pos = (800, 500)
+        self.add_entity('npc', "npc_1", npc)
+
+    def create_items(self):
+        """Crea items recolectables en el mapa"""
+        # Ejemplo de item
+        item = Item(
+            self.store,
+            item_id="pocion_salud",
+            name="Poción de Salud",
+            description="Restaura 30 puntos de salud"
+        )
+        item.pos = (600, 300)
+        self.add_entity('item', "item_1", item)
+
+    def create_enemies(self):
+        """Crea enemigos en el mapa"""
+        # Ejemplo de enemigo
+        enemy = Enemy(
+            self.store,
+            enemy_id="lobo",
+            name="Lobo Salvaje",
+            health=40,
+            max_health=40,
+            attack=8,
+            defense=5,
+            speed=7
+        )
+        enemy.pos = (1000, 800)
+        self.add_entity('enemy', "enemy_1", enemy)
+
+    def entity_group(self, kind):
+        return {'npc': self.npcs, 'item': self.items, 'enemy': self.enemies}[kind]
+
+    def add_entity(self, kind, entity_id, entity):
+        """Añade un NPC/item/enemigo al mapa y al índice espacial"""
+        self.entity_group(kind)[entity_id] = entity
+        key = self._entity_keys[entity.id] = (kind, entity_id)
+        self.entity_index.insert(key, entity.x, entity.y, entity.width, entity.height)
+
+    def remove_entity(self, kind, entity_id):
+        """Quita una entidad del mapa, del índice espacial y del almacén"""
+        entity = self.entity_group(kind).pop(entity_id)
+        self.entity_index.remove(self._entity_keys.pop(entity.id))
+        entity.despawn()
+        return entity
+
+    def _on_entity_moved(self, store_id):
+        # Si la entidad se mueve o cambia de tamaño, actualizar solo su entrada
+        key = self._entity_keys.get(store_id)
+        if key is not None:
+            store = self.store
+            self.entity_index.update(key, store.x[store_id], store.y[store_id],
+                                     store.width[store_id], store.height[store_id])
+
+    # === Tick ===
+
+    def emit(self, name, *args):
+        """Evento para las vistas (texto nuevo, sonido, cambio de pantalla...)
+
+        ('sound', nombre, tono, prioridad), ('hud',), ('dialogue', texto),
+        ('combat_started', enemy_id), ('combat', mensaje), ('purchase', item_id, ok)...
+        """
+        self.events.append((name, *args))
+
+    def step(self, dt, inputs=()):
+        """Aplica los comandos, avanza un tick de dt segundos y devuelve el estado
+
+        inputs es una secuencia de comandos (nombre, *args), p. ej. ('move', 2, 0)
+        o ('buy', 'espada'); ver self.commands.
+        """
+        self.events = []
+        for command in inputs:
+            self.commands[command[0]](*command[1:])
+        self.timers.advance(dt)
+        self.simulate(dt)
+
+        # Verificar colisiones
+        if self.game_state == 'exploring':
+            with profiler.phase('collision'):
+                obj_type, obj_id = self.check_collisions()
+            if obj_type == 'npc':
+                self.start_dialogue(obj_id)
+            elif obj_type == 'item':
+                self.collect_item(obj_id)
+            elif obj_type == 'enemy':
+                self.start_combat(obj_id)
+        self.tick += 1
+        return self.state()
+
+    def state(self):
+        """Resumen del estado tras el último tick"""
+        char = self.characters[self.current_character]
+        return {
+            'tick': self.tick,
+            'time': self.timers.time,
+            'game_state': self.game_state,
+            'character': self.current_character,
+            'position': char.pos,
+            'health': char.health,
+            'mana': char.mana,
+            'gold': self.gold,
+            'inventory': dict(self.inventory),
+            'enemies': len(self.enemies),
+            'camera': (self.camera_x, self.camera_y),
+            'events': self.events
+        }
+
+    def simulate(self, dt):
+        """Avanza un tick fijo: animación, enemigos y cámara"""
+        # Actualizar animación
+        self.animation_time += dt
+        if self.animation_time > 0.2:
+            self.animation_time = 0
+            self.animation_frame = (self.animation_frame + 1) % 3
+
+        # Actualizar personajes
+        view_width, view_height = self.view_size
+        for char in self.characters.values():
+            if char.visible:
+                # Actualizar posición de la cámara para seguir al personaje
+                self.target_camera_x = char.x - view_width / 2 + char.width / 2
+                self.target_camera_y = char.y - view_height / 2 + char.height / 2
+
+                # Limitar la cámara al tamaño del mapa
+                self.target_camera_x = max(0, min(self.target_camera_x, self.map_size[0] - view_width))
+                self.target_camera_y = max(0, min(self.target_camera_y, self.map_size[1] - view_height))
+
+        # En combate, diálogo o tienda los enemigos esperan
+        if self.game_state == 'exploring':
+            with profiler.phase('ai'):
+                self.chase_enemies(dt)
+
+        # Mover la cámara suavemente hacia el objetivo (una vez por tick)
+        self.prev_camera = (self.camera_x, self.camera_y)
+        self.camera_x += (self.target_camera_x - self.camera_x) / self.camera_speed
+        self.camera_y += (self.target_camera_y - self.camera_y) / self.camera_speed
+
+    def chase_enemies(self, dt):
+        """Los enemigos cercanos siguen el campo de flujo hacia el personaje visible"""
+        char = self.characters.get(self.current_character)
+        if char is None or not self.enemies:
+            return
+        target_x, target_y = char.center_x, char.center_y
+        for enemy in self.enemies.values():
+            x, y = enemy.center_x, enemy.center_y
+            if (target_x - x) ** 2 + (target_y - y) ** 2 > ENEMY_CHASE_RADIUS ** 2:
+                continue
+            # Solo recalcula el campo si el personaje cambió de celda
+            self.flow_field.update(target_x, target_y)
+            dir_x, dir_y = self.flow_field.directions(x, y)
+            if dir_x == 0 and dir_y == 0:
+                continue  # Ya está en la celda del personaje o no hay camino
+            step = enemy.speed * ENEMY_SPEED_SCALE * dt
+            enemy.pos = (enemy.x + dir_x * step, enemy.y + dir_y * step)
+
+    def check_collisions(self):
+        """Verifica colisiones entre el personaje actual y otros objetos"""
+        current_char = self.characters[self.current_character]
+
+        # Solo se comprueban las entidades de las celdas vecinas; prioridad
+        # NPCs, luego items, luego enemigos (y orden de creación)
+        hits = self.entity_index.overlapping(current_char.x, current_char.y,
+                                             current_char.width, current_char.height)
+        if not hits:
+            return None, None
+        return min(hits, key=lambda key: COLLISION_PRIORITY[key[0]])
+
+    def digest(self):
+        """Huella del estado (entidades, partida y cámara) para comparar reproducciones"""
+        store = self.store
+        digest = hashlib.sha1()
+        for name in sorted(store.arrays):
+            digest.update(store.arrays[name][:store.count].tobytes())
+        digest.update(repr((self.tick, self.game_state, self.current_character, self.gold,
+                            sorted(self.inventory.items()), self.camera_x, self.camera_y,
+                            self.timers.time)).encode())
+        return digest.hexdigest()
+
+    # === Comandos ===
+
+    def move(self, dx, dy):
+        """Mueve al personaje actual (teclado en escritorio)"""
+        self.characters[self.current_character].move(dx, dy)
+
+    def interact(self):
+        """Acción de interactuar con el entorno (botón A)"""
+        if self.game_state == 'exploring':
+            # En modo exploración, interactuar con NPCs u objetos
+            obj_type, obj_id = self.check_collisions()
+            if obj_type == 'npc':
+                self.start_dialogue(obj_id)
+            elif obj_type == 'item':
+                self.collect_item(obj_id)
+        elif self.game_state == 'combat':
+            # En combate, atacar
+            self.combat.attack()
+        elif self.game_state == 'dialogue' and self.dialogue_queue:
+            # Avanzar en el diálogo
+            self.next_dialogue()
+
+        self.emit('sound', 'footstep', 1.0, 0)
+
+    def jump(self):
+        """Acción de saltar (botón X)"""
+        if self.game_state == 'combat':
+            # En combate, defender
+            self.combat.defend()
+
+        self.emit('sound', 'footstep', 1.2, 0)
+
+    def push(self):
+        """Acción de empujar (botón B)"""
+        if self.game_state == 'combat':
+            # En combate, usar objeto
+            self.combat.use_item()
+
+        self.emit('sound', 'footstep', 0.8, 0)
+
+    def switch_character(self):
+        """Acción de cambiar de personaje (botón Y)"""
+        if self.game_state != 'exploring':
+            return
+
+        # Cambiar al siguiente personaje
+        chars = list(self.characters.keys())
+        current_idx = chars.index(self.current_character)
+        self.current_character = chars[(current_idx + 1) % len(chars)]
+
+        # Actualizar visibilidad
+        for char_id, char in self.characters.items():
+            char.visible = (char_id == self.current_character)
+            if char.visible:
+                # Actualizar el sprite del personaje visible
+                char.update_sprite(self.animation_frame)
+
+        self.emit('hud')
+
+    def start_dialogue(self, npc_id):
+        """Inicia un diálogo con un NPC"""
+        if self.game_state != 'exploring':
+            return
+
+        self.game_state = 'dialogue'
+        self.dialogue_npc = self.npcs[npc_id]
+        self.dialogue_queue = deque(self.dialogue_npc.dialogue)
+
+        # Mostrar el primer mensaje
+        if self.dialogue_queue:
+            self.dialogue_text = self.dialogue_queue.popleft()
+            self.emit('dialogue', self.dialogue_text)
+
+    def next_dialogue(self):
+        """Muestra el siguiente mensaje en el diálogo"""
+        if self.dialogue_queue:
+            self.dialogue_text = self.dialogue_queue.popleft()
+            self.emit('dialogue', self.dialogue_text)
+        else:
+            self.close_dialogue()
+
+    def close_dialogue(self):
+        """Cierra el diálogo actual"""
+        self.game_state = 'exploring'
+        self.dialogue_npc = None
+        self.dialogue_queue.clear()
+        self.dialogue_text = ''
+        self.emit('dialogue_closed')
+
+    def collect_item(self, item_id):
+        """Recolecta un item del mapa"""
+        item = self.items[item_id]
+
+        # Añadir al inventario
+        self.inventory[item.item_id] = self.inventory.get(item.item_id, 0) + 1
+
+        # Eliminar del mapa
+        self.remove_entity('item', item_id)
+        self.emit('hud')
+
+    def start_combat(self, enemy_id):
+        """Inicia un combate con un enemigo"""
+        if self.game_state != 'exploring':
+            return
+
+        self.game_state = 'combat'
+        self.combat = Combat(self, self.current_character, enemy_id)
+
+        # Rugido del monstruo si es el monstruo ancestral
+        if enemy_id == 'monstruo':
+            self.emit('sound', 'monster_roar', 1.0, 2)
+        self.emit('combat_started', enemy_id)
+
+    def end_combat(self, result):
+        """Vuelve a explorar tras un combate ('won' o 'lost')"""
+        self.game_state = 'exploring'
+        self.combat = None
+        self.emit('combat_ended', result)
+
+    def start_memory_puzzle(self):
+        """Inicia el juego de memoria"""
+        if self.game_state != 'exploring':
+            return
+
+        self.game_state = 'puzzle'
+        self.puzzle = MemoryPuzzle(self, self.puzzle_level)
+        self.puzzle.start()
+
+    def end_memory_puzzle(self):
+        """Finaliza el puzzle con éxito"""
+        self.game_state = 'exploring'
+        self.puzzle = None
+
+        # Otorgar recompensa
+        self.inventory['pocion_salud'] = self.inventory.get('pocion_salud', 0) + 1
+        self.emit('hud')
+        self.emit('puzzle_ended')
+
+    def start_store(self):
+        """Abre la tienda"""
+        if self.game_state != 'exploring':
+            return
+
+        self.game_state = 'store'
+        self.emit('store_opened', STORE_ITEMS)
+
+    def buy_item(self, item_id):
+        """Compra un item de la tienda"""
+        item = ITEMS[item_id]
+
+        if self.gold < item['price']:
+            self.emit('purchase', item_id, False)
+            return
+
+        # Añadir al inventario y restar oro
+        self.inventory[item_id] = self.inventory.get(item_id, 0) + 1
+        self.gold -= item['price']
+        self.emit('purchase', item_id, True)
+        self.emit('hud')
+
+    def close_store(self):
+        if self.game_state == 'store':
+            self.game_state = 'exploring'
+            self.emit('store_closed')
+
+    # === Guardado ===
+
+    def save_data(self):
+        """Diccionario serializable con el progreso de la partida"""
+        return {
+            'character': self.current_character,
+            'inventory': self.inventory,
+            'gold': self.gold,
+            'mission': self.current_mission,
+            'characters': {
+                char_id: {
+                    'health': char.health,
+                    'mana': char.mana
+                } for char_id, char in self.characters.items()
+            },
+            'map_position': {
+                'x': self.camera_x,
+                'y': self.camera_y
+            }
+        }
+
+    def load_save(self, save_data):
+        """Restaura el progreso guardado con save_data()"""
+        # Restaurar inventario
+        self.inventory = save_data['inventory']
+        self.gold = save_data['gold']
+        self.current_mission = save_data['mission']
+
+        # Restaurar estado de los personajes
+        for char_id, char_data in save_data['characters'].items():
+            if char_id in self.characters:
+                char = self.characters[char_id]
+                char.health = char_data['health']
+                char.mana = char_data['mana']
+
+        # Restaurar posición en el mapa
+        self.camera_x = save_data['map_position']['x']
+        self.camera_y = save_data['map_position']['y']
+        self.target_camera_x = self.camera_x
+        self.target_camera_y = self.camera_y
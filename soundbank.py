@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""
+Banco de sonidos: el PCM generado se guarda como WAV en un único directorio,
+con el hash del contenido como nombre de archivo. Los archivos existentes se
+reutilizan entre arranques y los que ya no usa ningún sonido se borran.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import wave
+from functools import partial
+
+from kivy.core.audio import SoundLoader
+
+from asset_cache import asset_cache
+
+INDEX_FILE = 'index.json'
+EFFECT_VOICES = 4  # Copias de un efecto que pueden sonar a la vez sin el mezclador
+
+
+class SoundBank:
+    """Sonidos por nombre respaldados por archivos WAV direccionados por contenido"""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+        self._sounds = {}
+        self._effects = {}  # nombre -> copias del Sound para efectos superpuestos
+        self._effect_turn = {}  # nombre -> próxima copia a reiniciar si todas suenan
+        self._index = None
+
+    @property
+    def directory(self):
+        # Por defecto vive dentro de la caché de assets (user_data_dir de la app)
+        return self._directory or os.path.join(asset_cache.directory, 'sounds')
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.directory, INDEX_FILE), 'r') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), 'w') as f:
+                json.dump(self._index, f, indent=2)
+        except OSError as e:
+            print(f"No se pudo guardar el índice de sonidos: {e}")
+
+    def wav_path(self, pcm, sample_rate=44100, channels=1):
+        """Ruta del WAV para este contenido (el formato también forma parte del hash)"""
+        digest = hashlib.sha256(pcm)
+        digest.update(f"{sample_rate}:{channels}".encode('ascii'))
+        return os.path.join(self.directory, digest.hexdigest()[:32] + '.wav')
+
+    def write(self, pcm, sample_rate=44100, channels=1):
+        """Escribe el WAV si no existe y devuelve su ruta (se puede llamar desde un hilo)"""
+        path = self.wav_path(pcm, sample_rate, channels)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with wave.open(tmp_path, 'wb') as wav_file:
+                wav_file.setnchannels(channels)
+                wav_file.setsampwidth(2)  # 16-bit
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(pcm)
+            os.replace(tmp_path, path)
+        return path
+
+    def load(self, name, path):
+        """Asocia el nombre al WAV y carga el Sound (hilo principal)"""
+        index = self._load_index()
+        if index.get(name) != os.path.basename(path):
+            index[name] = os.path.basename(path)
+            self._save_index()
+
+        sound = SoundLoader.load(path)
+        self._sounds[name] = sound
+        self._effects.pop(name, None)
+        return sound
+
+    def register(self, name, pcm, sample_rate=44100, channels=1):
+        """Registra un sonido por nombre, escribiendo el WAV solo si no existe"""
+        try:
+            path = self.write(pcm, sample_rate, channels)
+        except (OSError, wave.Error) as e:
+            print(f"No se pudo escribir el sonido '{name}': {e}")
+            return None
+        return self.load(name, path)
+
+    def preload(self, loader, name, generator, *args, sample_rate=44100):
+        """Encola en un AssetLoader la síntesis y escritura del sonido"""
+        def work():
+            return self.write(asset_cache.pcm(generator, *args), sample_rate)
+        loader.submit(f'sonido:{name}', work, partial(self.load, name))
+
+    def get(self, name):
+        return self._sounds.get(name)
+
+    def path(self, name):
+        """Ruta del WAV registrado con ese nombre (o None)"""
+        filename = self._load_index().get(name)
+        return os.path.join(self.directory, filename) if filename else None
+
+    def play(self, name):
+        sound = self._sounds.get(name)
+        if sound:
+            sound.play()
+
+    def play_effect(self, name, pitch=1.0):
+        """Efecto que se puede superponer consigo mismo, con EFFECT_VOICES copias como tope
+
+        Usa una copia que no esté sonando (cargando otra si quedan huecos); si
+        todas suenan, reinicia por turnos la siguiente.
+        """
+        voices = self._effects.get(name)
+        if voices is None:
+            sound = self._sounds.get(name)
+            if not sound:
+                return None
+            voices = self._effects[name] = [sound]
+        sound = next((voice for voice in voices if voice.state != 'play'), None)
+        if sound is None and len(voices) < EFFECT_VOICES:
+            path = self.path(name)
+            sound = SoundLoader.load(path) if path else None
+            if sound:
+                voices.append(sound)
+        if sound is None:
+            turn = self._effect_turn.get(name, 0)
+            sound = voices[turn % len(voices)]
+            self._effect_turn[name] = turn + 1
+            sound.stop()
+        sound.pitch = pitch
+        sound.play()
+        return sound
+
+    def stop(self, name):
+        sound = self._sounds.get(name)
+        if sound:
+            sound.stop()
+        for voice in self._effects.get(name, ())[1:]:
+            voice.stop()
+
+    def cleanup(self):
+        """Borra los WAV huérfanos (que ningún nombre del índice referencia)"""
+        referenced = set(self._load_index().values())
+        removed = 0
+        try:
+            entries = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for entry in entries:
+            if (entry.endswith('.wav') or entry.endswith('.tmp')) and entry not in referenced:
+                try:
+                    os.remove(os.path.join(self.directory, entry))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+sound_bank = SoundBank()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Índices espaciales para consultas de proximidad.
+
+SpatialHash reparte rectángulos en una rejilla uniforme de celdas: una
+consulta solo mira las celdas que toca, así el coste depende de lo que hay
+cerca y no del número total de entidades del mapa.
+"""
+
+CELL_SIZE = 128
+
+
+class SpatialHash:
+    """Rejilla uniforme de rectángulos (x, y, ancho, alto) indexados por clave"""
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> set de claves
+        self.bounds = {}  # clave -> (x, y, ancho, alto)
+        self._ranges = {}  # clave -> (cx0, cy0, cx1, cy1)
+        self.order = {}  # clave -> orden de inserción (desempate estable)
+        self._next = 0
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def __contains__(self, key):
+        return key in self.bounds
+
+    def _cell_range(self, x, y, width, height):
+        size = self.cell_size
+        return (int(x // size), int(y // size),
+                int((x + width) // size), int((y + height) // size))
+
+    def insert(self, key, x, y, width, height):
+        if key in self.bounds:
+            self.update(key, x, y, width, height)
+            return
+        self.order[key] = self._next
+        self._next += 1
+        self.bounds[key] = (x, y, width, height)
+        cell_range = self._ranges[key] = self._cell_range(x, y, width, height)
+        self._link(key, cell_range)
+
+    def update(self, key, x, y, width, height):
+        """Mueve un rectángulo; solo toca las celdas si cambió de celda"""
+        self.bounds[key] = (x, y, width, height)
+        cell_range = self._cell_range(x, y, width, height)
+        if cell_range != self._ranges[key]:
+            self._unlink(key, self._ranges[key])
+            self._ranges[key] = cell_range
+            self._link(key, cell_range)
+
+    def remove(self, key):
+        if key not in self.bounds:
+            return
+        self._unlink(key, self._ranges.pop(key))
+        del self.bounds[key]
+        del self.order[key]
+
+    def _link(self, key, cell_range):
+        cx0, cy0, cx1, cy1 = cell_range
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                self.cells.setdefault((cx, cy), set()).add(key)
+
+    def _unlink(self, key, cell_range):
+        cx0, cy0, cx1, cy1 = cell_range
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del self.cells[(cx, cy)]
+
+    def query(self, x, y, width, height):
+        """Claves candidatas en las celdas que toca el rectángulo"""
+        cx0, cy0, cx1, cy1 = self._cell_range(x, y, width, height)
+        found = set()
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found |= cell
+        return found
+
+    def overlapping(self, x, y, width, height):
+        """Claves cuyos rectángulos se solapan con el dado, en orden de inserción"""
+        hits = []
+        for key in self.query(x, y, width, height):
+            bx, by, bw, bh = self.bounds[key]
+            if bx < x + width and x < bx + bw and by < y + height and y < by + bh:
+                hits.append(key)
+        hits.sort(key=self.order.__getitem__)
+        return hits
+
+
+class PointIndex:
+    """Índice estático de puntos de interés tipados, con radio por tipo
+
+    Cada tipo se registra con su radio de interacción y su prioridad; nearest()
+    solo mira las celdas al alcance del radio mayor y compara distancias al
+    cuadrado.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.kinds = {}  # tipo -> (prioridad, radio²)
+        self.cells = {}  # (cx, cy) -> lista de (tipo, x, y, datos)
+        self.max_radius = 0
+        self.count = 0
+
+    def register_kind(self, kind, radius, priority=0):
+        self.kinds[kind] = (priority, radius * radius)
+        self.max_radius = max(self.max_radius, radius)
+
+    def add(self, kind, x, y, data=None):
+        if kind not in self.kinds:
+            raise KeyError(f"Tipo de punto no registrado: {kind}")
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        self.cells.setdefault(cell, []).append((kind, x, y, data))
+        self.count += 1
+
+    def nearest(self, x, y):
+        """(tipo, datos) del punto de mayor prioridad al alcance; el más cercano entre iguales"""
+        size = self.cell_size
+        reach = self.max_radius
+        best = None
+        best_rank = None
+        for cy in range(int((y - reach) // size), int((y + reach) // size) + 1):
+            for cx in range(int((x - reach) // size), int((x + reach) // size) + 1):
+                for kind, px, py, data in self.cells.get((cx, cy), ()):
+                    priority, radius_sq = self.kinds[kind]
+                    dist_sq = (px - x) ** 2 + (py - y) ** 2
+                    if dist_sq < radius_sq and (best_rank is None or (priority, dist_sq) < best_rank):
+                        best, best_rank = (kind, data), (priority, dist_sq)
+        return best
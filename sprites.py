@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generadores procedurales de sprites y fondos.
+
+Las funciones render_* pintan sobre un PixelCanvas y no tocan la GPU, así que
+pueden ejecutarse fuera del hilo principal. Las funciones create_*_texture
+suben el resultado a una textura de Kivy.
+"""
+
+import math
+
+import numpy as np
+
+from raster import PixelCanvas, texture_from_buffer
+
+CHARACTER_SIZE = (32, 64)  # Personajes son más altos que anchos
+ITEM_SIZE = (32, 32)
+ENEMY_SIZE = (32, 32)
+LOGO_SIZE = (250, 100)
+
+SKIN_COLOR = (220, 180, 140, 255)
+
+
+def create_texture_from_pixels(pixels, width, height):
+    """Crea una textura de Kivy a partir de una matriz de píxeles"""
+    buffer = np.asarray(pixels, dtype=np.uint8).reshape(height, width, 4).tobytes()
+    return texture_from_buffer(buffer, width, height)
+
+
+def _render_alan(canvas, animation_frame):
+    # Cuerpo - tono de piel
+    canvas.fill_rect(12, 20, 20, 45, SKIN_COLOR)
+    # Pelo negro medio largo
+    canvas.fill_ellipse(8, 10, 24, 20, 16, 15, 40, (20, 20, 20, 255))
+    # Lentes azules
+    glasses_color = (50, 100, 200, 255)
+    canvas.fill_rect(10, 15, 14, 18, glasses_color)
+    canvas.fill_rect(18, 15, 22, 18, glasses_color)
+    # Patilla de los lentes
+    canvas.fill_rect(9, 16, 10, 20, glasses_color)
+    canvas.fill_rect(22, 16, 23, 20, glasses_color)
+    # Campera negra desprendida
+    canvas.fill_ellipse(8, 20, 24, 35, 16, 28, 10, (30, 30, 30, 255), sx=15, sy=40)
+    # Remera gris
+    canvas.fill_rect(12, 25, 20, 40, (150, 150, 150, 255))
+    # Pantalón azul
+    canvas.fill_taper(10, 40, 22, 55, 16, 6, 3, (50, 100, 200, 255))
+    # Zapatillas blancas
+    canvas.fill_ellipse(8, 55, 24, 60, 16, 57, 10, (240, 240, 240, 255), sx=20)
+    # Mochila
+    canvas.fill_rect(6, 25, 10, 35, (80, 80, 80, 255))
+    # Fierro en la mano (dependiendo del frame de animación)
+    weapon_color = (100, 100, 100, 255)
+    if animation_frame == 0:
+        canvas.fill_rect(22, 30, 24, 35, weapon_color)  # Posición normal
+    elif animation_frame == 1:
+        canvas.fill_rect(22, 20, 24, 25, weapon_color)  # Levantado
+    else:
+        canvas.fill_rect(22, 35, 24, 40, weapon_color)  # Bajado
+
+
+def _render_alexis(canvas, animation_frame):
+    # Cuerpo - tono de piel
+    canvas.fill_rect(12, 20, 20, 45, SKIN_COLOR)
+    # Pelo corto negro
+    canvas.fill_ellipse(10, 10, 22, 16, 16, 13, 15, (20, 20, 20, 255), sx=10)
+    # Cabeza medianamente cuadrada
+    canvas.fill_mask(10, 10, 22, 20,
+                     lambda xs, ys: ((xs - 16) ** 2 < 30) & ((ys - 15) ** 2 < 20),
+                     SKIN_COLOR)
+    # Remera manga corta azul oscuro
+    canvas.fill_ellipse(10, 20, 22, 35, 16, 28, 10, (30, 60, 150, 255), sx=15, sy=25)
+    # Mangas
+    sleeve_color = (20, 40, 100, 255)
+    canvas.fill_rect(8, 20, 10, 28, sleeve_color)
+    canvas.fill_rect(22, 20, 24, 28, sleeve_color)
+    # Pantalón blanco amarillento
+    canvas.fill_taper(10, 35, 22, 55, 16, 6, 4, (220, 210, 150, 255))
+    # Zapatillas negras
+    canvas.fill_ellipse(8, 55, 24, 60, 16, 57, 10, (30, 30, 30, 255), sx=20)
+    # Mochila
+    canvas.fill_rect(6, 25, 10, 35, (50, 100, 50, 255))
+    # Cuchillo en la mano (dependiendo del frame de animación)
+    weapon_color = (200, 200, 200, 255)
+    if animation_frame == 0:
+        canvas.fill_rect(22, 30, 24, 33, weapon_color)  # Posición normal
+    elif animation_frame == 1:
+        canvas.fill_rect(24, 25, 28, 30, (150, 150, 150, 255))  # Lanzando
+    else:
+        canvas.fill_rect(22, 33, 24, 36, weapon_color)  # Bajado
+
+
+def _render_joaquin(canvas, animation_frame):
+    # Cuerpo - tono de piel
+    canvas.fill_rect(12, 20, 20, 45, SKIN_COLOR)
+    # Pelo con rulos
+    hair_color = (80, 50, 20, 255)
+    canvas.fill_ellipse(8, 8, 24, 16, 16, 12, 15, hair_color, sx=10)
+    # Rulos (círculos pequeños)
+    canvas.fill_mask(10, 10, 22, 15,
+                     lambda xs, ys: ((xs - 13) ** 2 + (ys - 12) ** 2 < 3) |
+                                    ((xs - 19) ** 2 + (ys - 12) ** 2 < 3),
+                     hair_color)
+    # Remera manga corta blanca
+    canvas.fill_ellipse(10, 20, 22, 35, 16, 28, 10, (240, 240, 240, 255), sx=15, sy=25)
+    # Shorts azules
+    canvas.fill_taper(10, 35, 22, 45, 16, 6, 2, (50, 100, 200, 255))
+    # Zapatillas chanclas
+    sandal_color = (150, 100, 50, 255)
+    canvas.fill_rect(12, 55, 20, 58, sandal_color)
+    # Correa
+    canvas.fill_rect(16, 53, 17, 56, sandal_color)
+
+
+def _render_monstruo(canvas, animation_frame):
+    # Cuerpo musculoso - tono de piel oscuro
+    canvas.fill_ellipse(10, 20, 22, 45, 16, 30, 10, (100, 70, 50, 255), sx=15, sy=25)
+    # Cabeza de venado
+    canvas.fill_ellipse(8, 5, 24, 20, 16, 12, 10, (120, 80, 50, 255), sx=15, sy=10)
+    # Ojos
+    canvas.fill_rect(12, 10, 14, 12, (0, 0, 0, 255))
+    canvas.fill_rect(18, 10, 20, 12, (0, 0, 0, 255))
+    # Cuernos
+    canvas.fill_ellipse(14, 0, 18, 10, 16, 5, 5, (80, 50, 20, 255))
+    # Pantalón corto roto
+    canvas.fill_taper(10, 40, 22, 50, 16, 6, 2, (100, 80, 60, 255))
+    # Roturas
+    canvas.fill_rect(12, 42, 13, 48, (20, 20, 20, 255))
+    canvas.fill_rect(20, 42, 21, 48, (20, 20, 20, 255))
+    # Arco y flechas (dependiendo del frame de animación)
+    bow_color = (100, 70, 40, 255)
+    string_color = (200, 200, 200, 255)
+    if animation_frame == 0:
+        # Arco normal
+        canvas.fill_rect(6, 25, 8, 35, bow_color)
+        canvas.fill_rect(7, 25, 8, 35, string_color)
+    elif animation_frame == 1:
+        # Arco tensado
+        canvas.fill_rect(4, 25, 6, 35, bow_color)
+        canvas.fill_rect(5, 25, 6, 35, string_color)
+    else:
+        # Flecha lanzada
+        canvas.fill_rect(20, 28, 28, 32, (150, 100, 50, 255))
+        canvas.fill_rect(27, 28, 28, 32, (200, 200, 200, 255))
+
+
+def _render_npc(canvas, animation_frame):
+    # Cuerpo - tono de piel
+    canvas.fill_rect(12, 20, 20, 45, SKIN_COLOR)
+    # Pelo marrón
+    canvas.fill_ellipse(10, 10, 22, 18, 16, 14, 15, (100, 70, 50, 255), sx=10)
+    # Sombrero
+    canvas.fill_ellipse(8, 5, 24, 10, 16, 7, 15, (100, 50, 50, 255), sx=15)
+    # Camisa azul
+    canvas.fill_ellipse(10, 20, 22, 35, 16, 28, 10, (50, 100, 200, 255), sx=15, sy=25)
+    # Pantalones marrones
+    canvas.fill_taper(10, 35, 22, 55, 16, 6, 3, (120, 80, 50, 255))
+
+
+CHARACTER_RENDERERS = {
+    'alan': _render_alan,
+    'alexis': _render_alexis,
+    'joaquin': _render_joaquin,
+    'monstruo': _render_monstruo,
+    'npc': _render_npc,
+}
+
+
+def render_character(character_type, animation_frame=0):
+    """Pinta el sprite de un personaje y devuelve su PixelCanvas"""
+    canvas = PixelCanvas(*CHARACTER_SIZE)
+
+    renderer = CHARACTER_RENDERERS.get(character_type)
+    if renderer:
+        renderer(canvas, animation_frame)
+
+    # Aplicar efecto de animación si es necesario
+    if animation_frame > 0 and character_type in ['alan', 'alexis', 'joaquin', 'monstruo']:
+        # Pequeño movimiento en los brazos o piernas
+        if animation_frame == 1:
+            canvas.fill_rect(8, 25, 10, 30, SKIN_COLOR)  # Brazo izquierdo levantado
+        elif animation_frame == 2:
+            canvas.fill_rect(22, 25, 24, 30, SKIN_COLOR)  # Brazo derecho levantado
+
+    return canvas
+
+
+def render_item(item_type):
+    """Pinta el sprite de un item y devuelve su PixelCanvas"""
+    canvas = PixelCanvas(*ITEM_SIZE)
+
+    if item_type in ('pocion_salud', 'pocion_mana'):
+        # Botella roja o azul
+        bottle_color = (200, 50, 50, 255) if item_type == 'pocion_salud' else (50, 50, 200, 255)
+        canvas.fill_ellipse(12, 10, 20, 25, 16, 18, 5, bottle_color, sx=10, sy=20)
+        # Tapón
+        canvas.fill_rect(14, 8, 18, 10, (100, 100, 100, 255))
+
+    elif item_type == 'comida':
+        # Manzana roja
+        canvas.fill_ellipse(10, 10, 22, 22, 16, 16, 30, (200, 50, 50, 255))
+        # Tallo
+        canvas.fill_rect(15, 8, 17, 10, (100, 70, 50, 255))
+
+    elif item_type == 'espada':
+        # Mango marrón
+        canvas.fill_rect(14, 20, 18, 30, (120, 80, 50, 255))
+        # Hoja gris
+        canvas.fill_ellipse(12, 10, 20, 20, 16, 15, 5, (150, 150, 150, 255), sx=5, sy=15)
+        # Pomo
+        canvas.fill_rect(14, 30, 18, 32, (200, 200, 100, 255))
+
+    return canvas
+
+
+def render_enemy(enemy_type, animation_frame=0):
+    """Pinta el sprite de un enemigo y devuelve su PixelCanvas"""
+    if enemy_type == 'monstruo':
+        return render_character('monstruo', animation_frame)
+
+    canvas = PixelCanvas(*ENEMY_SIZE)
+
+    if enemy_type in ('lobo', 'oso'):
+        if enemy_type == 'lobo':
+            body_color, leg_color, eye_color = (100, 100, 100, 255), (80, 80, 80, 255), (200, 50, 50, 255)
+            body_sx = 20
+        else:
+            body_color, leg_color, eye_color = (120, 80, 50, 255), (100, 60, 30, 255), (20, 20, 20, 255)
+            body_sx = 15
+        # Cuerpo
+        canvas.fill_ellipse(8, 10, 24, 25, 16, 18, 10, body_color, sx=body_sx, sy=10)
+        # Patas
+        canvas.fill_rect(10, 25, 13, 30, leg_color)
+        canvas.fill_rect(19, 25, 22, 30, leg_color)
+        # Cabeza
+        canvas.fill_ellipse(5, 5, 15, 15, 10, 10, 20, body_color)
+        # Ojos
+        canvas.set_pixel(8, 8, eye_color)
+        canvas.set_pixel(12, 8, eye_color)
+
+    return canvas
+
+
+def render_background(background_type, width, height):
+    """Pinta un fondo a pantalla completa y devuelve su PixelCanvas"""
+    canvas = PixelCanvas(width, height, fill=(0, 0, 0, 255))
+
+    if background_type == 'mountain_static':
+        # Cielo
+        canvas.fill_rect(0, 0, width, height, (135, 206, 235, 255))
+
+        # Montañas lejanas y cercanas: cada columna se rellena hasta el borde
+        for count, peak, color in ((3, 0.4, (80, 80, 80, 255)), (2, 0.6, (100, 100, 100, 255))):
+            half = width // (count * 2)
+            xs = np.arange(width // count)
+            mountain_heights = (height * peak * (1 - np.abs(xs - half) / half)).astype(np.int64)
+            for i in range(count):
+                start_x = i * width // count - half
+                canvas.fill_columns(start_x + xs, height - mountain_heights, color)
+
+        # Suelo
+        canvas.fill_rect(0, int(height * 0.7), width, height, (50, 100, 50, 255))
+
+    elif background_type == 'fog':
+        # Niebla con patrón de ruido; los senos se evalúan con math para que
+        # el redondeo coincida exactamente con el de la versión escalar
+        sin_x = np.array([math.sin(x / 20) for x in range(width)])
+        cos_y = np.array([math.cos(y / 30) for y in range(height)])
+        noise = np.trunc(20 * sin_x[np.newaxis, :] * cos_y[:, np.newaxis]).astype(np.int64)
+        canvas.pixels[:, :, :3] = 200
+        canvas.pixels[:, :, 3] = np.clip(80 + noise, 50, 120)
+
+    elif background_type == 'logo':
+        # Logo del juego
+        canvas = PixelCanvas(*LOGO_SIZE)
+        # Dibujar texto simplificado (A)
+        canvas.fill_ellipse(20, 20, 40, 80, 30, 50, 1, (50, 100, 200, 255), sx=100, sy=400)
+        # Dibujar montaña
+        xs = np.arange(60, 200)
+        mountain_heights = (60 * (1 - np.abs(xs - 130) / 70)).astype(np.int64)
+        canvas.fill_mask(60, 40, 200, 100,
+                         lambda cols, ys: ys < 40 + mountain_heights[np.newaxis, :],
+                         (100, 100, 100, 255))
+        # Sol
+        canvas.fill_ellipse(180, 20, 200, 40, 190, 30, 60, (255, 255, 100, 255))
+
+    return canvas
+
+
+def create_character_texture(character_type, animation_frame=0):
+    """Crea una textura para un personaje específico"""
+    return render_character(character_type, animation_frame).to_texture()
+
+
+def create_item_texture(item_type):
+    """Crea una textura para un item específico"""
+    return render_item(item_type).to_texture()
+
+
+def create_enemy_texture(enemy_type, animation_frame=0):
+    """Crea una textura para un enemigo específico"""
+    return render_enemy(enemy_type, animation_frame).to_texture()
+
+
+def create_background_texture(background_type, size=None):
+    """Crea una textura para un fondo específico (por defecto, del tamaño de la ventana)"""
+    if size is None:
+        from kivy.core.window import Window
+        size = Window.size
+    return render_background(background_type, int(size[0]), int(size[1])).to_texture()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""
+Síntesis de audio vectorizada con NumPy.
+
+Los sonidos se construyen sobre arrays completos de muestras: osciladores,
+envolventes, ruido y ráfagas de eventos colocadas con una dispersión
+vectorizada (np.add.at). Ninguna etapa recorre las muestras en Python.
+"""
+
+import array
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+PCM_MAX = 32767
+
+
+# === Primitivas ===
+
+def sample_index(num_samples):
+    """Índices de muestra 0..n-1 como float64"""
+    return np.arange(num_samples, dtype=np.float64)
+
+
+def sine(frequency, index, sample_rate=SAMPLE_RATE):
+    """Oscilador senoidal; frequency puede ser un escalar o un array por muestra"""
+    return np.sin(2.0 * np.pi * frequency * index / sample_rate)
+
+
+def decay_envelope(index, num_samples, exponent):
+    """Envolvente (1 - i/n) ** exponent"""
+    return (1 - index / num_samples) ** exponent
+
+
+def noise(num_samples, rng):
+    """Ruido blanco uniforme en [-1, 1)"""
+    return rng.uniform(-1, 1, num_samples)
+
+
+def event_onsets(num_samples, probability, rng):
+    """Muestras en las que arranca un evento (una tirada por muestra)"""
+    return np.flatnonzero(rng.random(num_samples) < probability)
+
+
+def scatter_bursts(buffer, onsets, length, amplitude, frequencies, sample_rate=SAMPLE_RATE, offset=0):
+    """Suma en buffer una ráfaga senoidal de `length` muestras por cada onset
+
+    frequencies puede ser un array por onset (n,) o por muestra de ráfaga
+    (n, length). Cada aporte se trunca a entero como en la síntesis original.
+    offset es la muestra absoluta de buffer[0] (fase continua en streaming).
+    """
+    if len(onsets) == 0:
+        return buffer
+    positions = onsets[:, np.newaxis] + np.arange(length)[np.newaxis, :]
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    if frequencies.ndim == 1:
+        frequencies = frequencies[:, np.newaxis]
+    values = np.trunc(amplitude * sine(frequencies, positions + offset, sample_rate))
+    inside = positions < len(buffer)
+    np.add.at(buffer, positions[inside], np.broadcast_to(values, positions.shape)[inside])
+    return buffer
+
+
+def normalize(buffer):
+    """Escala al rango completo de 16 bits (truncando como int())"""
+    max_val = np.max(np.abs(buffer)) if len(buffer) else 0
+    if max_val > 0:
+        buffer = np.trunc(buffer * (PCM_MAX / max_val))
+    return buffer
+
+
+def to_pcm(buffer):
+    """Bytes PCM 16-bit little endian"""
+    return np.asarray(buffer).astype('<i2').tobytes()
+
+
+# === Sonidos del juego ===
+
+def generate_sine_wave(frequency, duration, sample_rate=SAMPLE_RATE):
+    """Genera una onda sinusoidal como buffer de audio"""
+    index = sample_index(int(duration * sample_rate))
+    samples = np.trunc(32767.0 * sine(frequency, index, sample_rate)).astype(np.int16)
+    return array.array('h', samples.tobytes())
+
+
+def generate_city_sound(seed=None):
+    """Genera un sonido tranquilo de ciudad para RPG"""
+    rng = np.random.default_rng(seed)
+    num_samples = int(2.0 * SAMPLE_RATE)
+    index = sample_index(num_samples)
+
+    # Sonido de fondo muy suave (tono bajo)
+    buffer = np.trunc(500 * sine(87.31, index))
+    # Sonido ocasional de campana (cada 0.5 segundos)
+    bell = np.arange(num_samples) % int(SAMPLE_RATE * 0.5) < 100
+    buffer += np.where(bell, np.trunc(2000 * sine(440, index)), 0)
+    # Sonido de pájaros suaves
+    onsets = event_onsets(num_samples, 0.01, rng)
+    scatter_bursts(buffer, onsets, 100, 1000, 800 + rng.integers(0, 401, len(onsets)))
+
+    return to_pcm(normalize(buffer))
+
+
+def generate_mountain_sound(seed=None):
+    """Genera un sonido de suspenso para la montaña"""
+    rng = np.random.default_rng(seed)
+    num_samples = int(2.0 * SAMPLE_RATE)
+    index = sample_index(num_samples)
+
+    # Base de suspenso
+    buffer = np.trunc(1000 * sine(55.0, index))
+    # Sonido de viento
+    wind_freq = 20 + 10 * np.sin(index / 10000.0)
+    buffer += np.trunc(500 * sine(wind_freq, index))
+    # Sonido de arroyo ocasional
+    onsets = event_onsets(num_samples, 0.05, rng)
+    scatter_bursts(buffer, onsets, 200, 800, 1000 + rng.integers(0, 501, len(onsets)))
+    # Sonido de hojas moviéndose (frecuencia nueva en cada muestra de la ráfaga)
+    onsets = event_onsets(num_samples, 0.02, rng)
+    scatter_bursts(buffer, onsets, 50, 300, 500 + rng.integers(0, 501, (len(onsets), 50)))
+
+    return to_pcm(normalize(buffer))
+
+
+def generate_footstep_sound():
+    """Genera un sonido de pasos"""
+    num_samples = int(0.3 * SAMPLE_RATE)
+    index = sample_index(num_samples)
+
+    # Frecuencia decreciente para simular impacto, con amplitud decreciente
+    freq = 200 - (index / num_samples) * 150
+    amp = 3000 * decay_envelope(index, num_samples, 2)
+    return to_pcm(np.trunc(amp * sine(freq, index)))
+
+
+def generate_monster_roar():
+    """Genera un rugido del monstruo"""
+    num_samples = int(1.0 * SAMPLE_RATE)
+    index = sample_index(num_samples)
+
+    # Frecuencia variable para efecto de rugido
+    freq = 80 + 20 * np.sin(index / 5000.0) + 10 * np.sin(index / 1000.0)
+    # Amplitud alta al principio, luego decae
+    amp = 8000 * decay_envelope(index, num_samples, 1.5)
+    # Añadir armónicos para hacerlo más rugoso
+    harmonic1 = 0.3 * amp * sine(freq * 2, index)
+    harmonic2 = 0.1 * amp * sine(freq * 3, index)
+    buffer = np.trunc(amp * sine(freq, index) + harmonic1 + harmonic2)
+
+    return to_pcm(normalize(buffer))
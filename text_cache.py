@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Caché de textos renderizados: cada combinación distinta de (texto, fuente,
+tamaño, color) se maqueta una sola vez con CoreLabel y se dibuja después como
+un Rectangle texturizado.
+"""
+
+from collections import OrderedDict
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Rectangle
+
+DEFAULT_FONT_SIZE = 15
+DEFAULT_CAPACITY = 128
+
+
+class TextCache:
+    """Texturas de texto con desalojo LRU y contadores de renderizado por frame"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._textures = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+        # Contadores por frame (ver end_frame)
+        self.frame_renders = 0
+        self.last_frame_renders = 0
+        self.steady_frames = 0
+
+    def texture(self, text, font_name=None, font_size=DEFAULT_FONT_SIZE, color=(1, 1, 1, 1)):
+        """Devuelve la textura del texto, maquetándola solo la primera vez"""
+        key = (text, font_name, font_size, tuple(color))
+        texture = self._textures.get(key)
+        if texture is not None:
+            self._textures.move_to_end(key)
+            self.hits += 1
+            return texture
+
+        options = {'text': text, 'font_size': font_size, 'color': color}
+        if font_name:
+            options['font_name'] = font_name
+        label = CoreLabel(**options)
+        label.refresh()
+        texture = label.texture
+        self._textures[key] = texture
+        self.renders += 1
+        self.frame_renders += 1
+        if len(self._textures) > self.capacity:
+            self._textures.popitem(last=False)
+            self.evictions += 1
+        return texture
+
+    def dibujar(self, canvas, text, pos, **style):
+        """Añade el texto al canvas como un Rectangle texturizado y lo devuelve"""
+        texture = self.texture(text, **style)
+        with canvas:
+            return Rectangle(texture=texture, pos=pos, size=texture.size)
+
+    def end_frame(self):
+        """Cierra el frame actual; devuelve cuántos textos se maquetaron en él"""
+        self.last_frame_renders = self.frame_renders
+        self.steady_frames = self.steady_frames + 1 if self.frame_renders == 0 else 0
+        self.frame_renders = 0
+        return self.last_frame_renders
+
+    def stats(self):
+        return {
+            'entries': len(self._textures),
+            'hits': self.hits,
+            'renders': self.renders,
+            'evictions': self.evictions,
+            'last_frame_renders': self.last_frame_renders,
+            'steady_frames': self.steady_frames
+        }
+
+
+text_cache = TextCache()